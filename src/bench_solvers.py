@@ -0,0 +1,124 @@
+
+# coding: utf-8
+
+'''
+Work-precision benchmark of the solver backends of Lode.integrate.
+
+The ensemble of m_orbit (triaxisPtbSSS of data/d0100.hdf5) is
+integrated by every backend at several tolerances. The error is the
+maximal deviation from a DOP853 reference with rtol = atol = 1.0e-13,
+the cost is the best wall time of nrepeat runs. vrk4 steps are capped
+by the output spacing, so coarser dt values are left out.
+
+    $ python bench_solvers.py                   # t in [0, 4]
+    $ python bench_solvers.py --tend 12 --mag 5.0e-2 --target 1.0e-4
+    $ python bench_solvers.py --plot work_precision.pdf
+'''
+
+from os import path
+import argparse, time
+
+import numpy as np
+import lib.Ldata as dm
+import lib.Lode as ode
+
+fn = path.join('data','d0100.hdf5')
+
+tols = [1.0e-4, 1.0e-6, 1.0e-8, 1.0e-10]
+configs = (
+    [('odeint', dict(rtol=tol, atol=tol*1.0e-2)) for tol in tols]
+    + [('LSODA', dict(rtol=tol, atol=tol*1.0e-2)) for tol in tols]
+    + [('RK45', dict(rtol=tol, atol=tol*1.0e-2)) for tol in tols]
+    + [('DOP853', dict(rtol=tol, atol=tol*1.0e-2)) for tol in tols]
+    + [('vrk45', dict(rtol=tol, atol=tol*1.0e-2)) for tol in tols]
+    + [('vrk4', dict(dt=dt)) for dt in (1.0e-2, 5.0e-3, 2.0e-3, 1.0e-3)]
+    )
+
+
+def optStr(opt):
+    return ' '.join('{0}={1:.0e}'.format(k, v) for k, v in opt.items())
+
+def wallTime(func, nrepeat):
+    best = None
+    for i in range(nrepeat):
+        t0 = time.perf_counter()
+        ret = func()
+        t = time.perf_counter() - t0
+        best = t if best is None else min(best, t)
+    return best, ret
+
+def workPrecision(mxyz, tarray, param, configs=configs, nrepeat=3):
+    '''
+    return: (reference, [(solver, opt, error, wall time), ...])
+    '''
+
+    ref = ode.integrate(mxyz, tarray, param, 'DOP853',
+                        rtol=1.0e-13, atol=1.0e-13)
+    results = []
+    for solver, opt in configs:
+        t, x = wallTime(
+            lambda: ode.integrate(mxyz, tarray, param, solver, **opt),
+            nrepeat)
+        results.append((solver, opt, np.max(np.abs(x - ref)), t))
+    return ref, results
+
+def plotWorkPrecision(results, fpath):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(5.4, 4.0), dpi=160)
+    ax = fig.add_subplot(1, 1, 1)
+    for solver in ode.solvers:
+        rs = [r for r in results if r[0] == solver]
+        if rs:
+            ax.loglog([r[3] for r in rs], [r[2] for r in rs],
+                      marker='o', label=solver)
+    ax.set_xlabel('wall time [s]')
+    ax.set_ylabel('max error')
+    ax.grid(True)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(fpath)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tend', type=float, default=4.0)
+    parser.add_argument('--nt', type=int, default=None,
+                        help='number of output times (default: 200*tend+1)')
+    parser.add_argument('--mag', type=float, default=5.0e-1)
+    parser.add_argument('--nrepeat', type=int, default=3)
+    parser.add_argument('--target', type=float, default=1.0e-3,
+                        help='accuracy target for the recommendation')
+    parser.add_argument('--plot', default=None)
+    args = parser.parse_args()
+
+    bdata = dm.loadData(fn)
+    mdata = dm.triaxisPtbSSS(bdata, mag=args.mag)
+    nt = args.nt or int(200*args.tend) + 1
+    tarray = np.linspace(0.0, args.tend, nt)
+
+    # vrk4 never steps over an output interval, so a coarser dt
+    # would only repeat the result of dt = spacing
+    spacing = tarray[1] - tarray[0]
+    _configs = [(solver, opt) for solver, opt in configs
+                    if solver != 'vrk4' or opt['dt'] <= spacing*(1.0 + 1.0e-9)]
+    ref, results = workPrecision(mdata['xyz'], tarray, mdata['param'],
+                                 _configs, nrepeat=args.nrepeat)
+    print('{0:8s} {1:22s} {2:>10s} {3:>10s}'.format(
+            'solver', 'options', 'error', 'time [s]'))
+    for solver, opt, err, t in results:
+        print('{0:8s} {1:22s} {2:10.2e} {3:10.4f}'.format(
+                solver, optStr(opt), err, t))
+
+    ok = [r for r in results if r[2] <= args.target]
+    if ok:
+        solver, opt, err, t = min(ok, key=lambda r: r[3])
+        print('cheapest with error <= {0:.1e}: {1} {2}'.format(
+                args.target, solver, optStr(opt)))
+    else:
+        print('no backend reaches error <= {0:.1e}'.format(args.target))
+
+    if args.plot:
+        plotWorkPrecision(results, args.plot)
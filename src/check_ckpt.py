@@ -0,0 +1,95 @@
+# coding: utf-8
+
+'''
+Check that checkpointed runs (lib.Lckpt) give the result of
+an uninterrupted run (Lode.evolvLM and Lode.appendEigVecs).
+
+Each solver is run once straight through and once killed after
+a few integration calls and resumed; both results must be identical
+to the uninterrupted run.
+
+    $ python check_ckpt.py
+'''
+
+import sys, os, tempfile
+import numpy as np
+
+import lib.Ldata as dm
+import lib.Lode as ode
+import lib.Lckpt as ckpt
+
+# solver: (options, integration calls before the kill)
+cases = {
+    'odeint': (dict(), 2),
+    'vrk4': (dict(dt=1.0e-3), 3),
+    }
+
+keys = ('xyz', 'eigValDF', 'eigVecDF', 'eigValSymDF', 'eigVecSymDF')
+
+
+class Killed(Exception):
+    pass
+
+def killAfter(ncalls):
+    '''
+    Make Lode.integrate raise Killed at its ncalls-th call;
+    return the function that restores it.
+    '''
+
+    integrate = ode.integrate
+    count = [0]
+    def wrapped(*args, **kwargs):
+        count[0] += 1
+        if count[0] == ncalls:
+            raise Killed()
+        return integrate(*args, **kwargs)
+    ode.integrate = wrapped
+    def restore():
+        ode.integrate = integrate
+    return restore
+
+def reference(mdata, tarray, solver, opt):
+    data = ode.evolvLM(mdata, tarray, solver=solver, **opt)
+    ode.appendEigVecs(data)
+    return data
+
+def compare(fpath, ref):
+    data = dm.loadData(fpath)
+    return [k for k in keys if not np.array_equal(data[k], ref[k])]
+
+
+if __name__ == '__main__':
+    orbit = dm.loadData(os.path.join('data', 'lm_orbit.hdf5'))
+    mdata = dict(DataType='mss', xyz=orbit['xyz'][:4,0],
+                 param=orbit['param'])
+    tarray = orbit['tarray'][:401]
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for solver, (opt, ncalls) in cases.items():
+            ref = reference(mdata, tarray, solver, opt)
+
+            fpath = os.path.join(tmp, solver + '.hdf5')
+            ckpt.runCkpt(fpath, mdata, tarray, solver=solver,
+                         segment=50, **opt)
+            bad = compare(fpath, ref)
+
+            fpath = os.path.join(tmp, solver + '_killed.hdf5')
+            restore = killAfter(ncalls)
+            try:
+                ckpt.runCkpt(fpath, mdata, tarray, solver=solver,
+                             segment=50, every=0.0, **opt)
+            except Killed:
+                pass
+            finally:
+                restore()
+            ckpt.resumeCkpt(fpath)
+            badKilled = compare(fpath, ref)
+
+            failed = failed or bool(bad) or bool(badKilled)
+            print('{0}: straight {1}, killed and resumed {2}'.format(
+                    solver,
+                    'differs in ' + ' '.join(bad) if bad else 'ok',
+                    'differs in ' + ' '.join(badKilled) if badKilled
+                                                        else 'ok'))
+    sys.exit(1 if failed else 0)
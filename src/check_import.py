@@ -0,0 +1,80 @@
+
+# coding: utf-8
+
+'''
+Import-time budget check for the library modules.
+
+Each module is imported in a fresh interpreter.
+A module fails if it loads one of its forbidden packages at import
+time, or if its import costs more than its budget on top of numpy.
+The cost is taken from one `-X importtime` run: the cumulative time
+of the module minus that of the numpy import under it, so that the
+time of numpy, measured in another interpreter, is not subtracted.
+
+    $ python check_import.py
+'''
+
+import sys, subprocess
+
+# module: (budget without numpy in ms, forbidden packages)
+budgets = {
+    'lib.Ldata': (30.0, ('scipy', 'matplotlib', 'h5py')),
+    'lib.Lode': (30.0, ('scipy', 'matplotlib', 'h5py')),
+    'lib.Lftle': (30.0, ('scipy', 'matplotlib', 'h5py')),
+    'lib.Lcatalog': (30.0, ('scipy', 'matplotlib', 'h5py')),
+    'lib.Lstage': (30.0, ('numpy', 'scipy', 'matplotlib', 'h5py')),
+    'lib.Lmeasure': (30.0, ('scipy', 'matplotlib', 'h5py')),
+    'lib.Lnpy': (30.0, ('scipy', 'matplotlib', 'h5py')),
+    'lib.Lckpt': (30.0, ('scipy', 'matplotlib', 'h5py')),
+    'lib.Ldraw': (30.0, ('scipy', 'matplotlib', 'h5py')),
+    }
+
+nrepeat = 5
+
+
+def importTime(module):
+    '''
+    Best of nrepeat import times of module without numpy in ms:
+    its cumulative time minus the cumulative time of numpy
+    in the same run (0 if it does not import numpy).
+    '''
+
+    best = None
+    for i in range(nrepeat):
+        out = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+            stderr=subprocess.PIPE, universal_newlines=True
+            ).stderr
+        cum = dict()
+        for line in out.splitlines():
+            cols = line.split('|')
+            if len(cols) == 3 and cols[1].strip().isdigit():
+                cum.setdefault(cols[2].strip(), int(cols[1]))
+        t = (cum[module] - cum.get('numpy', 0))/1.0e3
+        best = t if best is None else min(best, t)
+    return best
+
+def loadedPackages(module, packages):
+    code = ('import sys, {0}; '
+            'print(" ".join(p for p in {1!r} if p in sys.modules))'
+            ).format(module, tuple(packages))
+    out = subprocess.run([sys.executable, '-c', code],
+                         stdout=subprocess.PIPE, universal_newlines=True
+                         ).stdout
+    return out.split()
+
+
+if __name__ == '__main__':
+    failed = False
+    for module, (budget, forbidden) in budgets.items():
+        # forbidden packages
+        loaded = loadedPackages(module, forbidden)
+        failed = failed or bool(loaded)
+        if loaded:
+            print('{0}: loads {1}  FAILED'.format(module, ' '.join(loaded)))
+        # time budget
+        t = importTime(module)
+        failed = failed or (t > budget)
+        print('{0}: {1:.1f} ms (budget {2:.0f} ms){3}'.format(
+                module, t, budget, '' if t <= budget else '  FAILED'))
+    sys.exit(1 if failed else 0)
@@ -7,23 +7,34 @@ import lib.Ldata as dm
 import lib.Lode as ode
 
 fn = path.join('data','d0100.hdf5')
-bdata =  dm.loadData(fn)
 trange = np.linspace(.0, 4., 801)
 ltrange = np.linspace(.0, 12., 2401) #long trange
 
-data_sts = ode.evolvL(bdata, trange)
-ode.appendEigVecs(data_sts)
-outfn = path.join('data','s_orbit.hdf5')
-dm.saveData(outfn, data_sts)
-
-mdata = dm.triaxisPtbSSS(bdata)
-data_mts = ode.evolvLM(mdata, trange)
-ode.appendEigVecs(data_mts)
-outfn = path.join('data','m_orbit.hdf5')
-dm.saveData(outfn,data_mts)
-
-lmdata = dm.triaxisPtbSSS(bdata,mag=5.0e-2)
-ldata_mts = ode.evolvLM(lmdata, ltrange)
-ode.appendEigVecs(ldata_mts)
-outfn = path.join('data','lm_orbit.hdf5')
-dm.saveData(outfn,ldata_mts)
+s_orbit_fn = path.join('data','s_orbit.hdf5')
+m_orbit_fn = path.join('data','m_orbit.hdf5')
+lm_orbit_fn = path.join('data','lm_orbit.hdf5')
+
+def comp_s_orbit(outfn=s_orbit_fn, overwrite=False):
+    bdata =  dm.loadData(fn)
+    data_sts = ode.evolvL(bdata, trange)
+    ode.appendEigVecs(data_sts)
+    dm.saveData(outfn, data_sts, overwrite)
+
+def comp_m_orbit(outfn=m_orbit_fn, overwrite=False):
+    bdata =  dm.loadData(fn)
+    mdata = dm.triaxisPtbSSS(bdata)
+    data_mts = ode.evolvLM(mdata, trange)
+    ode.appendEigVecs(data_mts)
+    dm.saveData(outfn, data_mts, overwrite)
+
+def comp_lm_orbit(outfn=lm_orbit_fn, overwrite=False):
+    bdata =  dm.loadData(fn)
+    lmdata = dm.triaxisPtbSSS(bdata,mag=5.0e-2)
+    ldata_mts = ode.evolvLM(lmdata, ltrange)
+    ode.appendEigVecs(ldata_mts)
+    dm.saveData(outfn, ldata_mts, overwrite)
+
+if __name__ == '__main__':
+    comp_s_orbit()
+    comp_m_orbit()
+    comp_lm_orbit()
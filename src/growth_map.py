@@ -0,0 +1,80 @@
+
+# coding: utf-8
+
+'''
+Transient growth of the rotating 2D example (fig4paper-ex2)
+    u' = A(t) u,  A = A(t; alpha, beta, omega)  (see Lode.rotA)
+on a grid of (alpha, beta, omega).
+
+    $ python growth_map.py                          # 40 x 40 x 40
+    $ python growth_map.py --alpha -0.5 0.5 50 --beta 0 2 50 \
+                           --omega 0.5 5 40 -o data/growth.hdf5
+
+The output file holds
+    alpha, beta, omega: the axes
+    growth, tgrowth: max_t |u(t)|/|u(0)| from u(0) = (1, 0) and its time
+    optgrowth, toptgrowth: the same maximized over all u(0)
+as (nalpha, nbeta, nomega) arrays.
+'''
+
+from os import path
+import argparse, time
+
+import numpy as np
+import lib.Ldata as dm
+import lib.Lode as ode
+
+
+def growthMap(fpath, alphas, betas, omegas, tend=20.0, dt=0.05,
+              overwrite=False):
+    if path.exists(fpath) and (not overwrite):
+        print(fpath + ' already exists!'); return None
+
+    grid = np.meshgrid(alphas, betas, omegas, indexing='ij')
+    shape = grid[0].shape
+    params = np.stack([g.ravel() for g in grid], axis=-1)
+    res = ode.rotGrowth(params, tend, dt)
+
+    import h5py
+    with h5py.File(fpath, 'w') as fh:
+        fh['alpha'] = alphas; fh['beta'] = betas; fh['omega'] = omegas
+        fh['growth'] = res['growth'][:,0].reshape(shape)
+        fh['tgrowth'] = res['tgrowth'][:,0].reshape(shape)
+        fh['optgrowth'] = res['optgrowth'].reshape(shape)
+        fh['toptgrowth'] = res['toptgrowth'].reshape(shape)
+        fh.attrs['tend'] = tend
+        fh.attrs['dt'] = dt
+        fh.attrs['created'] = dm.mkDateStr()
+    return res
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--alpha', type=float, nargs=3, default=(-0.5, 0.5, 40),
+                        metavar=('MIN', 'MAX', 'N'))
+    parser.add_argument('--beta', type=float, nargs=3, default=(0.0, 2.0, 40),
+                        metavar=('MIN', 'MAX', 'N'))
+    parser.add_argument('--omega', type=float, nargs=3, default=(0.5, 5.0, 40),
+                        metavar=('MIN', 'MAX', 'N'))
+    parser.add_argument('--tend', type=float, default=20.0)
+    parser.add_argument('--dt', type=float, default=0.05)
+    parser.add_argument('-o', '--output', 
+                        default=path.join('data', 'growth_map.hdf5'))
+    parser.add_argument('--overwrite', action='store_true')
+    args = parser.parse_args()
+
+    axes = [np.linspace(lo, hi, int(n))
+                for lo, hi, n in (args.alpha, args.beta, args.omega)]
+    t0 = time.perf_counter()
+    res = growthMap(args.output, *axes, tend=args.tend, dt=args.dt,
+                    overwrite=args.overwrite)
+    if res is not None:
+        P = len(res['optgrowth'])
+        i = np.argmax(res['optgrowth'])
+        a, b, w = np.unravel_index(i, [len(x) for x in axes])
+        print('{0:d} parameter sets in {1:.1f} s'.format(
+                P, time.perf_counter() - t0))
+        print('largest growth {0:.3e} at alpha={1:.3f} beta={2:.3f} '
+              'omega={3:.3f}, t={4:.2f}'.format(
+                res['optgrowth'][i], axes[0][a], axes[1][b], axes[2][w],
+                res['toptgrowth'][i]))
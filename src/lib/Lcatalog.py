@@ -0,0 +1,240 @@
+'''
+Run catalog.
+
+Every directory that holds data files may have a catalog file
+'catalog.sqlite' which indexes the metadata of the HDF5 files in it:
+    path (relative to the directory), DataType, sigma, r, b,
+    t0, t_end, nt, nmembers, precision, has_eig, mtime
+Ldata.saveData updates the catalog automatically.
+Queries never open the data files; they return RunHandle objects
+whose data is loaded only on RunHandle.load().
+Files that were deleted or rewritten outside saveData (their mtime
+differs from the cataloged one) are stale: queries skip them, and
+registerRun or rebuildCatalog indexes them again.
+
+Example:
+    runs = findRuns('data', DataType='mts', r=(24.0, 30.0),
+                    t_end=(10.0, None))
+    data = runs[0].load()
+'''
+
+import numpy as np
+import os, glob, sqlite3
+
+catalogName = 'catalog.sqlite'
+
+_columns = (
+    ('path', 'TEXT PRIMARY KEY'),
+    ('DataType', 'TEXT'),
+    ('sigma', 'REAL'),
+    ('r', 'REAL'),
+    ('b', 'REAL'),
+    ('t0', 'REAL'),
+    ('t_end', 'REAL'),
+    ('nt', 'INTEGER'),
+    ('nmembers', 'INTEGER'),
+    ('precision', 'TEXT'),
+    ('has_eig', 'INTEGER'),
+    ('mtime', 'REAL')
+    )
+_names = [c for c, _ in _columns]
+
+
+class RunHandle(object):
+    '''
+    A lazy handle of a cataloged run.
+    The metadata are attributes (handle.r, handle.t_end, ...);
+    the data file is read only by load().
+    '''
+
+    def __init__(self, dpath, row):
+        for k, v in zip(_names, row):
+            setattr(self, k, v)
+        self.fpath = os.path.join(dpath, self.path)
+
+    def load(self):
+        from . import Ldata
+        return Ldata.loadData(self.fpath)
+
+    def __repr__(self):
+        return 'RunHandle({0}, {1}, r={2}, t_end={3}, nmembers={4})'.format(
+                    self.path, self.DataType, self.r,
+                    self.t_end, self.nmembers)
+
+
+def catalogPath(dpath):
+    return os.path.join(dpath, catalogName)
+
+def _connect(cpath):
+    con = sqlite3.connect(cpath, timeout=30.0)
+    con.execute(
+        'CREATE TABLE IF NOT EXISTS runs ({0})'.format(
+            ', '.join(c + ' ' + t for c, t in _columns)))
+    con.execute('CREATE INDEX IF NOT EXISTS runs_type_r '
+                'ON runs (DataType, r)')
+    return con
+
+def _meta(DataType, param, tarray, xyz_shape, dtype, keys):
+    '''
+    Build a catalog row except path and mtime.
+    '''
+
+    sigma, r, b = [float(p) for p in param]
+    if tarray is None:
+        t0 = t_end = nt = None
+    else:
+        t0, t_end, nt = tarray
+    if DataType in ('mts', 'mss'):
+        nmembers = int(xyz_shape[0])
+    else:
+        nmembers = 1
+    precision = 'single' if dtype == np.float32 else 'double'
+    has_eig = int('eigValDF' in keys)
+    return dict(DataType=str(DataType), sigma=sigma, r=r, b=b,
+                t0=t0, t_end=t_end, nt=nt, nmembers=nmembers,
+                precision=precision, has_eig=has_eig)
+
+def dataMeta(data):
+    '''
+    Metadata of an in-memory data dictionary.
+    '''
+
+    tarray = data.get('tarray')
+    if tarray is not None:
+        tarray = (float(tarray[0]), float(tarray[-1]), len(tarray))
+    xyz = np.asarray(data['xyz'])
+    return _meta(data['DataType'], data['param'], tarray,
+                 xyz.shape, xyz.dtype, data.keys())
+
+def fileMeta(fpath):
+    '''
+    Metadata of a data file or a .npyd store.
+    Only attributes, param and both ends of tarray are read.
+    '''
+
+    from . import Lnpy
+    if Lnpy.isNpyStore(fpath):
+        manifest = Lnpy.readManifest(fpath)
+        arrays = manifest['arrays']
+        tarray = None
+        if 'tarray' in arrays:
+            t = np.load(os.path.join(fpath, 'tarray.npy'), mmap_mode='r')
+            tarray = (float(t[0]), float(t[-1]), len(t))
+        return _meta(manifest['DataType'], manifest['param'], tarray,
+                     arrays['xyz']['shape'], 
+                     np.dtype(arrays['xyz']['dtype']), list(arrays))
+
+    import h5py
+    with h5py.File(fpath, 'r') as fh:
+        dset_xyz = fh['xyz']
+        DataType = dset_xyz.attrs['DataType']
+        if isinstance(DataType, bytes):
+            DataType = DataType.decode()
+        tarray = None
+        if 'tarray' in fh:
+            dset_t = fh['tarray']
+            tarray = (float(dset_t[0]), float(dset_t[-1]), len(dset_t))
+        return _meta(DataType, fh['param'][()], tarray,
+                     dset_xyz.shape, dset_xyz.dtype, list(fh.keys()))
+
+def _upsert(con, dpath, fpath, meta):
+    row = dict(meta)
+    row['path'] = os.path.relpath(fpath, dpath)
+    row['mtime'] = os.path.getmtime(fpath)
+    con.execute(
+        'INSERT OR REPLACE INTO runs ({0}) VALUES ({1})'.format(
+            ', '.join(_names), ', '.join('?'*len(_names))),
+        [row[c] for c in _names])
+
+def registerRun(fpath, data=None, cpath=None):
+    '''
+    Add or update the catalog entry of fpath.
+    data: the saved data dictionary (if None, fpath is read)
+    cpath: catalog file (default: catalog.sqlite next to fpath)
+    '''
+
+    dpath = os.path.dirname(os.path.abspath(fpath))
+    if cpath == None:
+        cpath = catalogPath(dpath)
+    else:
+        dpath = os.path.dirname(os.path.abspath(cpath))
+    meta = fileMeta(fpath) if data is None else dataMeta(data)
+    con = _connect(cpath)
+    with con:
+        _upsert(con, dpath, os.path.abspath(fpath), meta)
+    con.close()
+
+def rebuildCatalog(dpath, patterns=('*.hdf5', '*.npyd')):
+    '''
+    Index all files matching patterns in dpath from scratch.
+    Files that are not run data are skipped.
+    return: number of indexed files
+    '''
+
+    con = _connect(catalogPath(dpath))
+    n = 0
+    with con:
+        con.execute('DELETE FROM runs')
+        fpaths = [f for pattern in patterns 
+                    for f in glob.glob(os.path.join(dpath, pattern))]
+        for fpath in sorted(fpaths):
+            try:
+                meta = fileMeta(fpath)
+            except (KeyError, OSError, ValueError):
+                continue
+            _upsert(con, os.path.abspath(dpath),
+                    os.path.abspath(fpath), meta)
+            n += 1
+    con.close()
+    return n
+
+def findRuns(dpath, **query):
+    '''
+    Find cataloged runs in dpath.
+
+    query: column=value or column=(lo, hi)
+        (lo, hi) is an inclusive range; None leaves a side open.
+        columns: DataType, sigma, r, b, t0, t_end, nt, nmembers,
+            precision, has_eig
+    return: list of RunHandle sorted by path;
+        rows whose file is missing or has another mtime are skipped
+    '''
+
+    cpath = catalogPath(dpath)
+    if not os.path.exists(cpath):
+        print(cpath + ' does NOT exist!')
+        return []
+
+    where = []; args = []
+    for k, v in query.items():
+        if k not in _names:
+            raise KeyError('unknown catalog column: ' + k)
+        if isinstance(v, (tuple, list)):
+            lo, hi = v
+            if lo is not None:
+                where.append(k + ' >= ?'); args.append(lo)
+            if hi is not None:
+                where.append(k + ' <= ?'); args.append(hi)
+        else:
+            where.append(k + ' = ?'); args.append(v)
+    sql = 'SELECT {0} FROM runs'.format(', '.join(_names))
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY path'
+
+    con = _connect(cpath)
+    rows = con.execute(sql, args).fetchall()
+    con.close()
+    dpath = os.path.abspath(dpath)
+    runs = []; stale = []
+    for row in rows:
+        run = RunHandle(dpath, row)
+        if (os.path.exists(run.fpath)
+                and os.path.getmtime(run.fpath) == run.mtime):
+            runs.append(run)
+        else:
+            stale.append(run.path)
+    if stale:
+        print('skipped stale entries (see rebuildCatalog): '
+              + ', '.join(stale))
+    return runs
@@ -0,0 +1,239 @@
+'''
+Checkpointed ensemble runs.
+
+runCkpt does what evolvLM, appendEigVecs and saveData do, but writes
+the output HDF5 file while it runs:
+    1. integrate the members block by block
+       (with 'vrk4', each block in segments of `segment` time steps)
+    2. track the eigenpairs along the reference orbit
+       (or along every member if members=True)
+Every `every` seconds the results computed since the last checkpoint,
+the list of finished member blocks, the float64 state and time index
+of the block in progress, the tracking position and the last
+eigenpairs used by arrangeEigVecs are written to the file. The file is
+closed between checkpoints, so a crash loses at most `every` seconds
+plus the block or segment in progress.
+
+resumeCkpt(fpath) continues from the last checkpoint, and the result
+is identical to an uninterrupted run (Lode.evolvLM and appendEigVecs):
+    - 'vrk4' steps each interval of tarray on its own, so a segment
+      started from the stored float64 state continues it exactly.
+    - The other solvers carry a state (step size, history) that is
+      not stored, so a block is integrated over the whole tarray in
+      one call and checkpoints fall only between member blocks.
+    - The tracking continues from the stored float64 eigenpairs.
+
+While running, the file holds a group 'checkpoint' (settings and
+state); it is removed when the run is complete.
+'''
+
+import numpy as np
+import os, json, time
+
+from . import Ldata as dm
+from . import Lode as ode
+from . import Lcatalog
+
+_eigKeys = ('eigValDF', 'eigVecDF', 'eigValSymDF', 'eigVecSymDF')
+
+
+def _eigShapes(N, T, members):
+    lead = (N, T) if members else (T,)
+    return [lead + (3,), lead + (3, 3), lead + (3,), lead + (3, 3)]
+
+def runCkpt(
+        fpath,
+        mdata,
+        tarray,
+        precision='double',
+        solver='odeint',
+        eig=True,
+        members=False,
+        block=None,
+        segment=100,
+        every=60.0,
+        overwrite=False,
+        **opt
+        ):
+    '''
+    Start a checkpointed run of an 'mss' data mdata.
+
+    precision, solver, opt: see Lode.evolvLM
+    eig: track the eigenpairs (see Lode.appendEigVecs)
+    members: track them along every member
+    block: members integrated in one call
+        (default: 1, or all members for the vectorized solvers)
+    segment: time steps integrated in one call with 'vrk4';
+        the other solvers integrate a block over the whole tarray
+    every: seconds between checkpoints
+
+    return: True when the run is complete
+    '''
+
+    if os.path.exists(fpath) and (not overwrite):
+        print(fpath + ' already exists!'); return None
+    if mdata['DataType'] != 'mss':
+        print('data type is not mss.'); return False
+
+    mxyz = np.asarray(mdata['xyz'], dtype=np.float64)
+    tarray = np.asarray(tarray, dtype=np.float64)
+    N = len(mxyz); T = len(tarray)
+    if block is None:
+        block = N if solver in ('vrk4', 'vrk45') else 1
+    segment = max(1, segment) if solver == 'vrk4' else T - 1
+    nblocks = -(-N//block)
+    rdtype, cdtype = dm.precisions[precision]
+
+    import h5py
+    with h5py.File(fpath, 'w') as fh:
+        fh.create_dataset('xyz', shape=(N, T, 3), dtype=rdtype,
+                          chunks=(1, T, 3))
+        fh['xyz'].attrs['DataType'] = 'mts'
+        fh['param'] = np.asarray(mdata['param'], dtype=np.float64)
+        fh['tarray'] = tarray
+        if eig:
+            dtypes = (cdtype, cdtype, cdtype, rdtype)
+            shapes = _eigShapes(N, T, members)
+            keys = [k + 'M' for k in _eigKeys] if members else _eigKeys
+            for k, shape, dtype in zip(keys, shapes, dtypes):
+                chunks = (1,) + shape[1:] if members else None
+                fh.create_dataset(k, shape=shape, dtype=dtype,
+                                  chunks=chunks)
+        ck = fh.create_group('checkpoint')
+        ck['xyz0'] = mxyz
+        ck['blocks_done'] = np.zeros(nblocks, dtype=bool)
+        ck.attrs['time_index'] = 0
+        ck.attrs['eig_index'] = 0
+        ck.attrs['settings'] = json.dumps(dict(
+            precision=precision, solver=solver, eig=eig, members=members,
+            block=block, segment=segment, every=every, opt=opt))
+
+    return resumeCkpt(fpath)
+
+
+def _readState(ck):
+    k = int(ck.attrs['eig_index'])
+    if k == 0:
+        return k, None
+    prev = [(ck['prevE{0:d}'.format(j)][()], ck['prevV{0:d}'.format(j)][()])
+                for j in range(2)]
+    return k, prev
+
+def _writeState(ck, k, prev):
+    for j, (e, v) in enumerate(prev):
+        for name, a in (('prevE', e), ('prevV', v)):
+            name = name + str(j)
+            if name in ck:
+                del ck[name]
+            ck[name] = a
+    ck.attrs['eig_index'] = k
+
+def resumeCkpt(fpath, every=None):
+    '''
+    Continue a checkpointed run from its last checkpoint.
+    every: seconds between checkpoints (default: as started)
+
+    return: True when the run is complete
+    '''
+
+    if not os.path.exists(fpath):
+        print(fpath + ' does NOT exist!'); return None
+
+    import h5py
+    with h5py.File(fpath, 'r') as fh:
+        if 'checkpoint' not in fh:
+            print(fpath + ' is already complete.'); return True
+        ck = fh['checkpoint']
+        st = json.loads(ck.attrs['settings'])
+        mxyz = ck['xyz0'][()]
+        done = ck['blocks_done'][()]
+        param = fh['param'][()]
+        tarray = fh['tarray'][()]
+    every = st['every'] if every is None else every
+    block = st['block']; N = len(mxyz)
+
+    # 1. integration, one block of members at a time,
+    #    one segment of tarray at a time
+    with h5py.File(fpath, 'r') as fh:
+        ck = fh['checkpoint']
+        j = int(ck.attrs.get('time_index', 0))
+        u = ck['u'][()] if j > 0 else None
+    segment = st.get('segment', len(tarray) - 1)
+    pending = []; tlast = time.time()
+    def flushBlocks(ib, j, u):
+        with h5py.File(fpath, 'a') as fh:
+            for kb, k0, sol in pending:
+                n, k1 = len(sol), k0 + sol.shape[1]
+                fh['xyz'][kb*block:kb*block + n, k0:k1] = sol
+            ck = fh['checkpoint']
+            ck['blocks_done'][:ib] = True
+            if 'u' in ck:
+                del ck['u']
+            if j > 0:
+                ck['u'] = u
+            ck.attrs['time_index'] = j
+        pending.clear()
+
+    ib = -1
+    for ib in np.flatnonzero(~done):
+        sl = slice(ib*block, min((ib + 1)*block, N))
+        if u is None:
+            j = 0; u = mxyz[sl]
+        while True:
+            j1 = min(j + segment, len(tarray) - 1)
+            sol = ode.integrate(u, tarray[j:j1 + 1], param,
+                                st['solver'], **st['opt'])
+            pending.append((ib, j, dm.castArray(sol, st['precision'])))
+            u = sol[:,-1]; j = j1
+            if j == len(tarray) - 1:
+                break
+            if time.time() - tlast > every:
+                flushBlocks(ib, j, u); tlast = time.time()
+        u = None
+        if time.time() - tlast > every:
+            flushBlocks(ib + 1, 0, None); tlast = time.time()
+    flushBlocks(ib + 1, 0, None)
+
+    # 2. eigenpairs, a range of time steps at a time
+    if st['eig']:
+        members = st['members']
+        with h5py.File(fpath, 'r') as fh:
+            xyz = fh['xyz'][()] if members else fh['xyz'][0]
+            k, prev = _readState(fh['checkpoint'])
+        if members:
+            evs = ode.iterEigVecsM(xyz, param, start=k, prev=prev)
+            keys = [key + 'M' for key in _eigKeys]
+        else:
+            evs = ode.iterEigVecs(xyz, param, start=k, prev=prev)
+            keys = _eigKeys
+        buf = []; k0 = k; tlast = time.time()
+
+        def flushEig(k0, buf):
+            with h5py.File(fpath, 'a') as fh:
+                if buf:
+                    k1 = k0 + len(buf)
+                    for j, key in enumerate(keys):
+                        dset = fh[key]
+                        a = np.array([(evA + evB)[j] for evA, evB in buf])
+                        a = a.astype(dset.dtype, copy=False)
+                        if members:
+                            dset[:,k0:k1] = np.swapaxes(a, 0, 1)
+                        else:
+                            dset[k0:k1] = a
+                    _writeState(fh['checkpoint'], k1, buf[-1])
+
+        for ev in evs:
+            buf.append(ev)
+            if time.time() - tlast > every:
+                flushEig(k0, buf)
+                k0 += len(buf); buf = []; tlast = time.time()
+        flushEig(k0, buf)
+
+    # done
+    with h5py.File(fpath, 'a') as fh:
+        if st['eig'] and st['members']:
+            for key in _eigKeys:
+                fh[key] = fh[key + 'M'][0]
+        del fh['checkpoint']
+    Lcatalog.registerRun(fpath)
+    return True
@@ -5,11 +5,36 @@ datatypes are:
     mss: multiple snap shot
     sts: single time series
     mts: multiple time series
+
+precisions are:
+    double: float64 / complex128 (default)
+    single: float32 / complex64
+        Only ensemble states and eigen results are stored in single
+        precision; 'param' and 'tarray' always stay in float64.
+        See doc/README-precision.txt for the error bounds.
+
+storage backends are:
+    HDF5 file (default)
+    .npyd directory of raw .npy arrays with a manifest (see Lnpy);
+        used for paths ending with '.npyd', read as np.memmap views
 '''
 
 import numpy as np
 import os, time
-import h5py
+
+from . import Lcatalog
+from . import Lnpy
+
+precisions = dict(
+                double = (np.float64, np.complex128),
+                single = (np.float32, np.complex64)
+            )
+
+_keepDouble = ('param', 'tarray')
+
+# arrays of 'mts' data with the member axis first;
+# they are chunked by member so that one member is read cheaply
+memberKeys = ('xyz', 'eigValDFM', 'eigVecDFM', 'eigValSymDFM', 'eigVecSymDFM')
 
 def mkDateStr():
 
@@ -41,34 +66,154 @@ def mkSSSData(
     data = dict(DataType='sss', xyz=np.asarray(xyz), param=np.asarray(param))
     return data
 
-def saveData(fpath, data, overwrite=False):
+def getPrecision(data):
+    '''
+    Return 'single' if data['xyz'] is stored in float32, 
+    otherwise 'double'.
+    '''
+
+    if np.asarray(data['xyz']).dtype == np.float32:
+        return 'single'
+    return 'double'
+
+def castArray(a, precision='double'):
+    '''
+    Cast a float or complex array to the dtype of precision.
+    Other arrays are returned unchanged.
+    '''
+
+    rdtype, cdtype = precisions[precision]
+    a = np.asarray(a)
+    if np.issubdtype(a.dtype, np.complexfloating):
+        return a.astype(cdtype, copy=False)
+    elif np.issubdtype(a.dtype, np.floating):
+        return a.astype(rdtype, copy=False)
+    return a
+
+def castData(data, precision='double'):
+    '''
+    Return a copy of data whose arrays are cast to precision.
+    'param' and 'tarray' are kept in float64.
+    '''
+
+    cdata = dict()
+    for k,v in data.items():
+        if (k in _keepDouble) or isinstance(v, (str, int)):
+            cdata[k] = v
+        else:
+            cdata[k] = castArray(v, precision)
+    return cdata
+
+def saveData(fpath, data, overwrite=False, precision=None, catalog=True):
+    '''
+    Save data to an HDF5 file, or to a .npyd store (see Lnpy).
+    precision: None, 'double' or 'single'
+        if given, arrays are cast by castData before writing.
+    catalog: True, False or a catalog file path
+        True updates catalog.sqlite next to fpath (see Lcatalog).
+    '''
     
     if os.path.exists(fpath) and (not overwrite):
         print(fpath + ' already exists!'); return None
+    if Lnpy.isNpyStore(fpath):
+        _data = data if precision == None else castData(data, precision)
+        Lnpy.saveNpy(fpath, _data)
+        if catalog:
+            cpath = None if catalog is True else catalog
+            Lcatalog.registerRun(fpath, _data, cpath)
+        return
     DataType = data.pop('DataType')
+    import h5py
+    _data = data if precision == None else castData(data, precision)
     with h5py.File(fpath, 'w') as fh:
-        for k,v in data.items():
-            fh[k] = v
+        for k,v in _data.items():
+            if DataType == 'mts' and k in memberKeys:
+                v = np.asarray(v)
+                fh.create_dataset(k, data=v, chunks=(1,) + v.shape[1:])
+            else:
+                fh[k] = v
         dset_xyz = fh['xyz']
         dset_xyz.attrs['DataType'] = DataType
     data['DataType'] = DataType
+    if catalog:
+        cpath = None if catalog is True else catalog
+        Lcatalog.registerRun(fpath, dict(_data, DataType=DataType), cpath)
     
-def loadData(fpath):
+def loadData(fpath, mmap=True):
+    '''
+    Load data from an HDF5 file or a .npyd store.
+    mmap: for a store, return np.memmap views instead of copies
+    '''
 
     if not os.path.exists(fpath): 
         print(fpath + ' does NOT exist!')
         return None
+    if Lnpy.isNpyStore(fpath):
+        return Lnpy.loadNpy(fpath, mmap)
 
+    import h5py
     with h5py.File(fpath, 'r') as fh:
         dset_xyz = fh['xyz']
         DataType = dset_xyz.attrs['DataType']
         data = dict(DataType=DataType)        
-        for k in fh:
-            data[k] = fh[k][()]
+        for k, v in fh.items():
+            # groups, e.g. the state of an unfinished Lckpt run
+            if isinstance(v, h5py.Dataset):
+                data[k] = v[()]
+
+    return data
+
+
+def loadMember(fpath, i):
+    '''
+    Load the ith member of an 'mts' file as 'sts' data.
+    Only the ith chunk of xyz and of the member eigen arrays is read;
+    eigValDFM[i] etc. are returned as eigValDF etc.
+    '''
+
+    if not os.path.exists(fpath): 
+        print(fpath + ' does NOT exist!')
+        return None
+    if Lnpy.isNpyStore(fpath):
+        return Lnpy.loadMemberNpy(fpath, i, memberKeys)
+
+    import h5py
+    with h5py.File(fpath, 'r') as fh:
+        dset_xyz = fh['xyz']
+        if dset_xyz.attrs['DataType'] != 'mts':
+            print(fpath + ' is not mts data!')
+            return None
+        data = dict(
+                    DataType = 'sts',
+                    param = fh['param'][()],
+                    tarray = fh['tarray'][()],
+                    xyz = dset_xyz[i]
+                    )
+        for k in memberKeys[1:]:
+            if k in fh:
+                data[k[:-1]] = fh[k][i]
 
     return data
 
 
+def convertData(src, dst, overwrite=False, catalog=True):
+    '''
+    Convert between an HDF5 file and a .npyd store 
+    (the direction is given by the paths).
+    Arrays are copied one dataset, or one member, at a time.
+    '''
+
+    if os.path.exists(dst) and (not overwrite):
+        print(dst + ' already exists!'); return None
+    if Lnpy.isNpyStore(dst):
+        Lnpy.hdf5ToNpy(src, dst, memberKeys)
+    else:
+        Lnpy.npyToHdf5(src, dst, memberKeys)
+    if catalog:
+        Lcatalog.registerRun(dst, None, 
+                             None if catalog is True else catalog)
+
+
 def pickSSS(tsdata, t):
     eps = 1.0e-8
     tarray = tsdata['tarray']
@@ -1,20 +1,16 @@
 import numpy as np
-import h5py
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.animation as animation
-from scipy.integrate import cumtrapz
-import time, os, subprocess, tempfile, shutil
+import os
 from abc import ABCMeta, abstractmethod
-from subprocess import call
 
-FFMpegWriter = animation.writers['ffmpeg']
+# matplotlib, the ffmpeg writer and h5py are imported on first use,
+# so that importing this module is cheap for compute-only processes.
 
 class Frame(metaclass=ABCMeta):
     def __init__(self,
         data,
         **attr
         ):
+        import matplotlib.pyplot as plt
         self.data = data.copy()
         self.fig = plt.figure(**attr)
         self.panes = []
@@ -102,6 +98,7 @@ class Frame(metaclass=ABCMeta):
         trange: (t0,t1); t0 < t1: floats
         '''
 
+        import matplotlib.animation as animation
         index = self.trange2Index(trange)
         #input('Hit Enter to Start.');
         self._ani = animation.FuncAnimation(
@@ -126,6 +123,8 @@ class Frame(metaclass=ABCMeta):
         dpi: dots per inch
         '''
         
+        import matplotlib.animation as animation
+        FFMpegWriter = animation.writers['ffmpeg']
         index = self.trange2Index(trange)
         moviewriter = FFMpegWriter(fps)
         with moviewriter.saving(
@@ -228,13 +227,30 @@ class Pane(metaclass=ABCMeta):
                     )
 
 
+def setAspect3D(ax, aspect):
+    '''
+    ax.set_aspect for 3D axes.
+    A number (e.g. aspect in conf_fig.p3attr) is accepted by the 
+    matplotlib the figures were made with but rejected by recent 
+    versions; it is then skipped.
+    '''
+
+    try:
+        ax.set_aspect(aspect)
+    except (ValueError, NotImplementedError):
+        pass
+
 class Pane3D(Pane):
     def _set(self, fig, gs, **attr):
+        from mpl_toolkits.mplot3d import Axes3D
+        aspect = attr.pop('aspect', None)
         self.ax = fig.add_subplot(
                         gs, 
                         projection='3d',
                         **attr
                         )
+        if aspect is not None:
+            setAspect3D(self.ax, aspect)
     
 class Pane2D(Pane):
     def _set(self, fig, gs, **attr):
@@ -285,6 +301,7 @@ class PanePhase3D(Pane3D):
     def __init__(self, frame, gs, **attr):
         Pane3D.__init__(self, frame, gs, **attr)
         self.bglines = None
+        self.bgdensity = None
 
     def _set(self, fig, gs, **attr):
         Pane3D._set(self, fig, gs, **attr)
@@ -308,49 +325,284 @@ class PanePhase3D(Pane3D):
 
         return self.lines
 
-    def setBG(self, fpath = None, **attr):
+    def setBG(self, fpath = None, level = 0.0, **attr):
+        '''
+        Draw the attractor in the background.
+
+        fpath: an HDF5 file with either
+            xyz: points of an orbit, drawn as a line
+                (default: data/attractor0.hdf5)
+            count, edges0-2: a histogram written by 
+                Lmeasure.invariantMeasure, drawn as a density:
+                one point per cell with count > level*max(count),
+                its alpha scaled by the count relative to 
+                the 95th percentile of the occupied cells
+        attr: properties passed to setBGProp
+        '''
+
         if fpath == None:
             dpath = os.path.split(__file__)[0]
             fpath = os.path.join(
                         dpath, 'data', 'attractor0.hdf5'
                         )
-            with h5py.File(fpath, 'r') as fh:
+        import h5py
+        with h5py.File(fpath, 'r') as fh:
+            if 'count' in fh:
+                count = fh['count'][()]
+                edges = [fh['edges{0:d}'.format(i)][()] for i in range(3)]
+                self._setBGDensity(count, edges, level)
+            else:
                 bgdata = fh['xyz'][()]
                 x,y,z =  bgdata.T
                 self.bglines = self.ax.plot(x,y,z)
-            self.setBGProp(**attr)
+                self.bgdensity = None
+        self.setBGProp(**attr)
+
+    def _setBGDensity(self, count, edges, level):
+        centers = [(e[1:] + e[:-1])/2.0 for e in edges]
+        idx = np.nonzero(count > level*count.max())
+        if len(idx[0]) == 0:
+            print('no cell of the histogram is above level.')
+            return False
+        x, y, z = [c[i] for c, i in zip(centers, idx)]
+        c = count[idx].astype(float)
+        self.bgdensity = np.clip(c/np.percentile(c, 95.0), 0.0, 1.0)
+        self.bglines = [self.ax.scatter(x, y, z, s=2.0, 
+                                        edgecolors='none',
+                                        depthshade=False)]
 
     def setBGProp(self, **attr):
         if not self.bglines:
             print('not set BackGround.')
             return False
+        elif self.bgdensity is None:
+            l, = self.bglines
+            l.set(**attr)
         else:
+            # line properties do not apply to the density;
+            # the alpha of color is scaled by the density
+            from matplotlib.colors import to_rgba
             l, = self.bglines
+            attr = dict(attr)
+            for k in ('linestyle', 'linewidth', 'marker'):
+                attr.pop(k, None)
+            color = attr.pop('color', None)
+            if color is not None:
+                rgba = np.tile(to_rgba(color), (len(self.bgdensity), 1))
+                rgba[:,3] *= self.bgdensity
+                l.set_facecolor(rgba)
             l.set(**attr)
 
 
 
+def _mkTrails(ax):
+    # a Line3DCollection whose segments are one (N, k, 3) array,
+    # projected with one call instead of one per segment
+    from mpl_toolkits.mplot3d import art3d, proj3d
+    from matplotlib.collections import LineCollection
+
+    class Trails3D(art3d.Line3DCollection):
+        def set_segments(self, segments):
+            self._segs3d = np.asarray(segments, dtype=float)
+            LineCollection.set_segments(self, [])
+
+        def do_3d_projection(self, renderer=None):
+            segs = self._segs3d
+            if segs.size == 0 or segs.ndim != 3:
+                LineCollection.set_segments(self, [])
+                return 1.0e9
+            xs, ys, zs = proj3d.proj_transform(
+                            *segs.reshape(-1, 3).T, self.axes.M)
+            xy = np.stack((xs, ys), axis=-1).reshape(segs.shape[:-1] + (2,))
+            LineCollection.set_segments(self, xy)
+            return np.min(zs)
+
+    trails = Trails3D([])
+    ax.add_collection(trails)
+    return trails
+
 class PanePhase3DM(PanePhase3D):
+    '''
+    Ensemble pane. All members are drawn by a few artists:
+    the trails by one line collection and the current points 
+    (the last point of the plotted time range) by one scatter
+    per marker shape, so that setting up and updating a frame 
+    does not loop over the members in Python.
+    '''
+
+    _alias = dict(c='color', ls='linestyle', lw='linewidth', 
+                  ms='markersize')
+
     def _set(self, fig, gs, **attr):
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import to_rgba_array
         Pane3D._set(self, fig, gs, **attr)
-        nfold = len(self.frame.data['xyz'])
-        self.lines = []
-        for i in range(nfold):
-            self.lines += self.ax.plot([],[],[])
+        xyz = self.frame.data['xyz']
+        nfold = len(xyz)
+        self.trails = _mkTrails(self.ax)
+        # (members, scatter) per marker shape; see _applyProp
+        self.heads = []
+        self._head = np.asarray(xyz[:,0], dtype=float)
+        self.lines = [self.trails]
+
+        # the defaults of Line3D: the color cycle, no marker
+        cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
+        cycle = to_rgba_array(cycle)
+        self._scalar = None
+        self._prop = dict(
+            color = cycle[np.arange(nfold) % len(cycle)],
+            linestyle = [plt.rcParams['lines.linestyle']]*nfold,
+            linewidth = np.full(nfold, plt.rcParams['lines.linewidth']),
+            marker = [None]*nfold,
+            markersize = np.full(nfold, plt.rcParams['lines.markersize'])
+            )
+        self._applyProp()
+
+    def setEnsembleProp(self, **prop):
+        '''
+        Set properties of all members at once.
+
+        prop: color, alpha, linestyle, linewidth, marker, markersize 
+            (as for Line2D); each is a single value or a sequence 
+            with one value per member.
+            Members whose marker is '', 'None' or None have no
+            current point.
+        '''
+
+        from matplotlib.colors import to_rgba_array
+        nfold = len(self._prop['color'])
+        for k, v in prop.items():
+            k = self._alias.get(k, k)
+            if k == 'color':
+                v = to_rgba_array(v)
+                self._prop['color'] = np.repeat(v, nfold, axis=0) \
+                                        if len(v) == 1 else v
+            elif k == 'alpha':
+                self._prop['color'][:,3] = v
+            elif k in ('linestyle', 'marker'):
+                self._prop[k] = [v]*nfold \
+                                if v is None or isinstance(v, str) else list(v)
+            elif k in ('linewidth', 'markersize'):
+                self._prop[k] = np.broadcast_to(
+                                    np.asarray(v, dtype=float), (nfold,)).copy()
+            else:
+                raise ValueError('unknown property: ' + k)
+        self._applyProp()
+
+    def set_line_prop(self, attr_list):
+        '''
+        set properties per member.
+
+        attr_list: 
+            list of dictionaries of line properties, one per member;
+            color, alpha, linestyle, linewidth, marker and markersize
+            are used (see setEnsembleProp), other keys are ignored.
+        '''
+
+        attr_list = [dict((self._alias.get(k, k), v) for k, v in a.items())
+                        for a in attr_list]
+        prop = dict()
+        for k in ('color', 'linestyle', 'linewidth', 'marker', 'markersize'):
+            if any(k in a for a in attr_list):
+                cur = list(self._prop[k])
+                for i, a in enumerate(attr_list[:len(cur)]):
+                    if k in a:
+                        cur[i] = a[k]
+                prop[k] = cur
+        if any('alpha' in a for a in attr_list):
+            alpha = prop.get('color', self._prop['color'])
+            prop['color'] = alpha = [tuple(c) for c in alpha]
+            from matplotlib.colors import to_rgba
+            for i, a in enumerate(attr_list[:len(alpha)]):
+                if 'alpha' in a:
+                    alpha[i] = to_rgba(alpha[i], a['alpha'])
+        self.setEnsembleProp(**prop)
+
+    def setColorScalar(self, values, cmap='viridis', vmin=None, vmax=None):
+        '''
+        Color the members by a scalar instead of their colors.
+
+        values: (N,) one value per member, or
+            (N, T) one value per member and time, e.g. the deviation 
+            from the reference np.linalg.norm(xyz - xyz[:1], axis=-1);
+            the value at the last plotted time is used.
+            None restores the colors of the members.
+        cmap, vmin, vmax: the colormap and its range 
+            (default: the range of values)
+        '''
+
+        if values is None:
+            self._scalar = None
+        else:
+            import matplotlib.pyplot as plt
+            from matplotlib.colors import Normalize
+            values = np.asarray(values)
+            vmin = np.nanmin(values) if vmin is None else vmin
+            vmax = np.nanmax(values) if vmax is None else vmax
+            self._scalar = (values, plt.get_cmap(cmap), 
+                            Normalize(vmin, vmax))
+        self._applyColors(-1)
+
+    def _applyProp(self):
+        prop = self._prop
+        self.trails.set_linestyle(prop['linestyle'])
+        self.trails.set_linewidth(prop['linewidth'])
+        # one scatter per marker shape, built again when the markers change
+        for members, sc in self.heads:
+            sc.remove()
+        self.heads = []
+        shapes = dict.fromkeys(m for m in prop['marker']
+                               if m not in (None, '', ' ', 'None', 'none'))
+        for m in shapes:
+            members = np.array([i for i, mi in enumerate(prop['marker'])
+                                if mi == m])
+            sc = self.ax.scatter(*np.transpose(self._head[members]),
+                                 marker=m, depthshade=False,
+                                 s=prop['markersize'][members]**2)
+            self.heads.append((members, sc))
+        self.lines = [self.trails] + [sc for members, sc in self.heads]
+        self._applyColors(-1)
+
+    def _applyColors(self, it):
+        colors = self._prop['color']
+        if self._scalar is not None:
+            values, cmap, norm = self._scalar
+            v = values if values.ndim == 1 else values[:,it]
+            alpha = colors[:,3]
+            colors = cmap(norm(v))
+            colors[:,3] *= alpha
+        self.trails.set_color(colors)
+        for members, sc in self.heads:
+            sc.set_facecolor(colors[members])
+            sc.set_edgecolor(colors[members])
 
     def _plot(self, index, data):
-        for l, xyz in zip(self.lines, data['xyz']):
-            _xyz = xyz[index]
-            x,y,z = np.transpose(_xyz)
-            l.set_data([x,y])
-            l.set_3d_properties(z)
+        xyz = data['xyz']
+        it = np.arange(xyz.shape[1])[index]
+        xyz = xyz[:,index]
+        if xyz.ndim == 2:
+            xyz = xyz[:,np.newaxis]
+        else:
+            it = it[-1]
+        self.trails.set_segments(xyz if xyz.shape[1] > 1 else [])
+        self._head = head = xyz[:,-1]
+        size = self._prop['markersize']**2
+        for members, sc in self.heads:
+            sc.set_offsets(head[members,:2])
+            sc.set_3d_properties(head[members,2], 'z')
+            # set_3d_properties keeps the sizes in the depth order
+            # of the last draw; give them back in member order
+            sc.set_sizes(size[members])
+        if self._scalar is not None:
+            self._applyColors(it)
             
         return self.lines
 
     def _reset(self):
-        for l in self.lines:
-            l.set_data([[],[]])
-            l.set_3d_properties([])
+        self.trails.set_segments([])
+        for members, sc in self.heads:
+            sc.set_offsets(np.empty((0, 2)))
+            sc.set_3d_properties([], 'z')
         return self.lines
 
 class PaneEig2D(Pane2D):
@@ -0,0 +1,214 @@
+'''
+Finite-time Lyapunov exponent (FTLE) maps.
+
+The grid is given by three axes (x, y, z).
+Each axis is a 1D array or a scalar; a scalar fixes the coordinate,
+so a 2D slice is e.g. (xs, ys, -16.0).
+The points are flattened in C order and split into tiles of
+tilesize points. Each tile is propagated with its tangent dynamics
+    du/dt = F(u), dPhi/dt = DF(u) Phi, Phi(0) = I
+by a vectorized RK4 and the FTLE
+    (1/T) log |Phi(T)|_2
+is recorded at every horizon T.
+
+File layout (HDF5):
+    ftle: (npoints, nhorizons) float64, NaN until computed
+    done: (ntiles,) bool
+    axis0, axis1, axis2, param, horizons: grid and settings
+    attrs: dt, tilesize
+A run that is interrupted is resumed by calling ftleMap again
+with the same arguments; tiles marked done are skipped.
+'''
+
+import numpy as np
+import os
+
+from . import Lode as ode
+
+
+def mkAxes(axes):
+    '''
+    Return a tuple of three 1D float64 arrays.
+    '''
+
+    return tuple(np.atleast_1d(np.asarray(a, dtype=np.float64))
+                    for a in axes)
+
+def tilePoints(axes, start, stop):
+    '''
+    Return the grid points with flat indices in [start, stop).
+    axes: output of mkAxes
+    return: (stop - start, 3) array
+    '''
+
+    shape = tuple(len(a) for a in axes)
+    idx = np.unravel_index(np.arange(start, stop), shape)
+    return np.stack([a[i] for a, i in zip(axes, idx)], axis=-1)
+
+def _rhs(u, Phi, sigma, r, b):
+    return (ode.FV(u, 0.0, sigma, r, b),
+            ode.DFVdot(u, Phi, 0.0, sigma, r, b))
+
+def propagateTile(xyz0, param, horizons, dt=2.0e-3):
+    '''
+    Propagate a tile of initial points with their tangent dynamics.
+
+    input::
+        xyz0: (M, 3) initial points
+        param: (sigma, r, b)
+        horizons: increasing times T >= dt
+        dt: RK4 step; each horizon is rounded to a multiple of dt
+
+    return::
+        ftle: (M, len(horizons)) array
+    '''
+
+    sigma, r, b = param
+    u = np.array(xyz0, dtype=np.float64)
+    M = len(u)
+    Phi = np.broadcast_to(np.eye(3), (M, 3, 3)).copy()
+    nsteps = [int(round(T/dt)) for T in horizons]
+    if min(nsteps) < 1 or np.any(np.diff(nsteps) < 0):
+        raise ValueError('horizons must be increasing and >= dt')
+    ftle = np.empty((M, len(horizons)))
+
+    ih = 0; step = 0
+    h = dt
+    while ih < len(nsteps):
+        if step == nsteps[ih]:
+            s = np.linalg.svd(Phi, compute_uv=False)[:,0]
+            ftle[:,ih] = np.log(s)/(step*dt)
+            ih += 1
+            continue
+        k1u, k1P = _rhs(u, Phi, sigma, r, b)
+        k2u, k2P = _rhs(u + 0.5*h*k1u, Phi + 0.5*h*k1P, sigma, r, b)
+        k3u, k3P = _rhs(u + 0.5*h*k2u, Phi + 0.5*h*k2P, sigma, r, b)
+        k4u, k4P = _rhs(u + h*k3u, Phi + h*k3P, sigma, r, b)
+        u += h/6.0*(k1u + 2.0*k2u + 2.0*k3u + k4u)
+        Phi += h/6.0*(k1P + 2.0*k2P + 2.0*k3P + k4P)
+        step += 1
+
+    return ftle
+
+def _tileWorker(args):
+    k, axes, tilesize, npoints, param, horizons, dt = args
+    start = k*tilesize; stop = min(start + tilesize, npoints)
+    xyz0 = tilePoints(axes, start, stop)
+    return k, propagateTile(xyz0, param, horizons, dt)
+
+def _initFile(fh, axes, param, horizons, dt, tilesize):
+    npoints = int(np.prod([len(a) for a in axes]))
+    ntiles = -(-npoints//tilesize)
+    for i, a in enumerate(axes):
+        fh['axis{0:d}'.format(i)] = a
+    fh['param'] = np.asarray(param, dtype=np.float64)
+    fh['horizons'] = np.asarray(horizons, dtype=np.float64)
+    fh.attrs['dt'] = dt
+    fh.attrs['tilesize'] = tilesize
+    fh.create_dataset('ftle',
+                    shape=(npoints, len(horizons)),
+                    dtype=np.float64,
+                    chunks=(min(tilesize, npoints), len(horizons)),
+                    fillvalue=np.nan
+                    )
+    fh.create_dataset('done', shape=(ntiles,), dtype=bool)
+
+def _sameSettings(fh, axes, param, horizons, dt, tilesize):
+    same = (fh.attrs['dt'] == dt) and (fh.attrs['tilesize'] == tilesize)
+    for i, a in enumerate(axes):
+        same = same and np.array_equal(fh['axis{0:d}'.format(i)][()], a)
+    same = same and np.array_equal(fh['param'][()], param)
+    same = same and np.array_equal(fh['horizons'][()], horizons)
+    return same
+
+def ftleMap(
+        fpath,
+        axes,
+        horizons,
+        param=np.array((10.0, 28.0, 2.666666)),
+        dt=2.0e-3,
+        tilesize=8192,
+        nproc=None
+        ):
+    '''
+    Compute (or resume) an FTLE map and write it to fpath.
+
+    axes: (x, y, z); each is a 1D array or a scalar
+    horizons: times T >= dt (sorted here)
+    param: (sigma, r, b)
+    dt: RK4 step
+    tilesize: points per tile
+    nproc: number of worker processes (None: os.cpu_count())
+
+    return: number of tiles computed in this call,
+        None if fpath holds a map with different settings
+        or a horizon is shorter than dt.
+    '''
+
+    axes = mkAxes(axes)
+    param = np.asarray(param, dtype=np.float64)
+    horizons = np.sort(np.atleast_1d(np.asarray(horizons, dtype=np.float64)))
+    if horizons[0] < dt:
+        print('horizons must be >= dt!')
+        return None
+    npoints = int(np.prod([len(a) for a in axes]))
+
+    import h5py
+    with h5py.File(fpath, 'a') as fh:
+        if 'ftle' in fh:
+            if not _sameSettings(fh, axes, param, horizons, dt, tilesize):
+                print(fpath + ' holds a map with different settings!')
+                return None
+        else:
+            _initFile(fh, axes, param, horizons, dt, tilesize)
+
+        done = fh['done']
+        todo = [k for k in np.flatnonzero(~done[()])]
+        jobs = [(k, axes, tilesize, npoints, param, horizons, dt)
+                    for k in todo]
+
+        def store(k, ftle):
+            start = k*tilesize
+            fh['ftle'][start:start + len(ftle)] = ftle
+            done[k] = True
+            fh.flush()
+
+        if nproc == 1:
+            for job in jobs:
+                store(*_tileWorker(job))
+        else:
+            from multiprocessing import Pool
+            with Pool(nproc) as pool:
+                for k, ftle in pool.imap_unordered(_tileWorker, jobs):
+                    store(k, ftle)
+
+    return len(jobs)
+
+def loadFTLE(fpath):
+    '''
+    Load an FTLE map.
+    return: dict with
+        ftle: (nx, ny, nz, nhorizons) array
+        axes: (x, y, z) 1D arrays
+        horizons, param, dt
+        complete: True if all tiles are done
+    '''
+
+    if not os.path.exists(fpath):
+        print(fpath + ' does NOT exist!')
+        return None
+
+    import h5py
+    with h5py.File(fpath, 'r') as fh:
+        axes = tuple(fh['axis{0:d}'.format(i)][()] for i in range(3))
+        shape = tuple(len(a) for a in axes)
+        horizons = fh['horizons'][()]
+        data = dict(
+                    ftle = fh['ftle'][()].reshape(shape + (len(horizons),)),
+                    axes = axes,
+                    horizons = horizons,
+                    param = fh['param'][()],
+                    dt = fh.attrs['dt'],
+                    complete = bool(np.all(fh['done'][()]))
+                    )
+    return data
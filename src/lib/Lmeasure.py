@@ -0,0 +1,175 @@
+'''
+Invariant measure of the Lorenz attractor.
+
+A long orbit is integrated chunk by chunk, so memory does not grow
+with its length. Every sample is binned into a 3D occupancy histogram,
+and optionally the eigenvalues of SDF = (DF + DF^T)/2 are summed per
+cell. The result can be drawn as a background by PanePhase3D.setBG.
+
+File layout (HDF5):
+    count: (nx, ny, nz) int64 number of samples per cell
+    edges0, edges1, edges2: bin edges
+    margin0, margin1, margin2: marginal counts along each axis
+    eigValSymDF: (nx, ny, nz, 3) time average of the eigenvalues of SDF
+        (descending order, NaN in empty cells); only if eig=True
+    xyz0, xyz_end: first and last point of the recorded orbit
+    param
+    attrs: tend, dt, transient, nsamples, noutside, solver, created
+'''
+
+import numpy as np
+import os
+
+from . import Lode as ode
+from . import Ldata as dm
+
+# the range of the axes used for the figures (conf_fig.p3attr)
+defaultBounds = ((-20.0, 20.0), (-30.0, 30.0), (-36.0, 12.0))
+
+
+class Histogram3D(object):
+    '''
+    Online 3D occupancy histogram with per-cell sums of SDF eigenvalues.
+    '''
+
+    def __init__(self, bounds=defaultBounds, bins=(64, 64, 64), eig=True):
+        self.edges = [np.linspace(lo, hi, n + 1)
+                        for (lo, hi), n in zip(bounds, bins)]
+        self.bins = tuple(bins)
+        self.count = np.zeros(self.bins, dtype=np.int64)
+        self.eigSum = np.zeros(self.bins + (3,)) if eig else None
+        self.nsamples = 0
+        self.noutside = 0
+
+    def add(self, xyz, param=None):
+        '''
+        xyz: (M, 3) samples
+        param: (sigma, r, b); needed for the SDF eigenvalues
+        '''
+
+        idx = [np.searchsorted(e, c, side='right') - 1
+                for e, c in zip(self.edges, xyz.T)]
+        inside = np.ones(len(xyz), dtype=bool)
+        for i, n in zip(idx, self.bins):
+            inside &= (i >= 0) & (i < n)
+        flat = np.ravel_multi_index([i[inside] for i in idx], self.bins)
+        ncell = self.count.size
+        self.count += np.bincount(flat, minlength=ncell).reshape(self.bins)
+        if self.eigSum is not None:
+            mu = np.linalg.eigvalsh(ode.SDFV(xyz[inside], 0.0, *param))
+            mu = mu[:,::-1]
+            esum = self.eigSum.reshape(ncell, 3)
+            for k in range(3):
+                esum[:,k] += np.bincount(flat, weights=mu[:,k],
+                                         minlength=ncell)
+        self.nsamples += len(xyz)
+        self.noutside += len(xyz) - int(np.count_nonzero(inside))
+
+    def marginals(self):
+        return [self.count.sum(axis=tuple(j for j in range(3) if j != i))
+                for i in range(3)]
+
+    def eigMean(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.eigSum/self.count[...,np.newaxis]
+
+
+def streamOrbit(xyz0, param, tend, dt=1.0e-2, nchunk=10000,
+                solver='odeint', **opt):
+    '''
+    Yield the samples of the orbit from xyz0 at t = dt, 2dt, ..., tend
+    as (<= nchunk, 3) arrays.
+    solver, opt: see Lode.integrate
+    '''
+
+    u = np.asarray(xyz0, dtype=np.float64)
+    nsteps = int(round(tend/dt))
+    done = 0
+    while done < nsteps:
+        n = min(nchunk, nsteps - done)
+        tarray = dt*np.arange(n + 1)
+        sol = ode.integrate(u, tarray, param, solver, **opt)[0]
+        u = sol[-1]
+        done += n
+        yield sol[1:]
+
+def invariantMeasure(
+        fpath,
+        param=np.array((10.0, 28.0, 2.666666)),
+        tend=1.0e4,
+        dt=1.0e-2,
+        transient=1.0e2,
+        xyz0=np.array((-3.45135654, -5.61985826, -16.07717065)),
+        bounds=defaultBounds,
+        bins=(64, 64, 64),
+        eig=True,
+        nchunk=10000,
+        solver='odeint',
+        overwrite=False,
+        **opt
+        ):
+    '''
+    Integrate a long orbit and write its histogram to fpath.
+
+    param: (sigma, r, b)
+    tend: length of the recorded orbit
+    dt: sampling interval
+    transient: time integrated from xyz0 before recording
+    bounds: ((xmin, xmax), (ymin, ymax), (zmin, zmax))
+    bins: number of cells along each axis
+    eig: accumulate the SDF eigenvalues per cell
+    nchunk: samples held in memory at once
+    solver, opt: see Lode.integrate
+
+    return: the Histogram3D
+    '''
+
+    if os.path.exists(fpath) and (not overwrite):
+        print(fpath + ' already exists!'); return None
+
+    param = np.asarray(param, dtype=np.float64)
+    u = np.asarray(xyz0, dtype=np.float64)
+    for sol in streamOrbit(u, param, transient, dt, nchunk, solver, **opt):
+        u = sol[-1]
+    start = u.copy()
+
+    hist = Histogram3D(bounds, bins, eig)
+    for sol in streamOrbit(start, param, tend, dt, nchunk, solver, **opt):
+        hist.add(sol, param)
+        u = sol[-1]
+
+    import h5py
+    with h5py.File(fpath, 'w') as fh:
+        fh['count'] = hist.count
+        for i, (e, m) in enumerate(zip(hist.edges, hist.marginals())):
+            fh['edges{0:d}'.format(i)] = e
+            fh['margin{0:d}'.format(i)] = m
+        if eig:
+            fh['eigValSymDF'] = hist.eigMean()
+        fh['xyz0'] = start
+        fh['xyz_end'] = u
+        fh['param'] = param
+        fh.attrs['tend'] = tend
+        fh.attrs['dt'] = dt
+        fh.attrs['transient'] = transient
+        fh.attrs['nsamples'] = hist.nsamples
+        fh.attrs['noutside'] = hist.noutside
+        fh.attrs['solver'] = solver
+        fh.attrs['created'] = dm.mkDateStr()
+
+    return hist
+
+def loadMeasure(fpath):
+    '''
+    Load a histogram file as a dictionary.
+    '''
+
+    if not os.path.exists(fpath):
+        print(fpath + ' does NOT exist!')
+        return None
+
+    import h5py
+    with h5py.File(fpath, 'r') as fh:
+        data = dict((k, fh[k][()]) for k in fh)
+        data.update(fh.attrs)
+    return data
@@ -0,0 +1,152 @@
+'''
+Memory-mapped chunk store, an alternative to the HDF5 files.
+
+A store is a directory (named *.npyd by convention) with
+    manifest.json: DataType, param, the keys with their shape and dtype,
+        non-array values (e.g. nfold) and the creation date
+    <key>.npy: one raw .npy file per array
+Arrays are read back as read-only np.memmap views, so processes that
+read the same store share the page cache instead of holding copies.
+
+Ldata.saveData / loadData / loadMember use this module for paths
+ending with npyExt; hdf5ToNpy and npyToHdf5 convert between layouts.
+'''
+
+import numpy as np
+import os, json, shutil
+
+npyExt = '.npyd'
+manifestName = 'manifest.json'
+
+
+def isNpyStore(path):
+    return path.endswith(npyExt) or os.path.isfile(
+                                    os.path.join(path, manifestName))
+
+def _writeManifest(dpath, DataType, param, arrays, attrs):
+    from .Ldata import mkDateStr
+    manifest = dict(
+        DataType = str(DataType),
+        param = [float(p) for p in param],
+        arrays = dict((k, dict(shape=list(shape), dtype=str(dtype)))
+                        for k, (shape, dtype) in arrays.items()),
+        attrs = attrs,
+        created = mkDateStr()
+        )
+    with open(os.path.join(dpath, manifestName), 'w') as fh:
+        json.dump(manifest, fh, indent=1)
+
+def _replace(tmp, dpath):
+    # the store appears under its name only when it is complete
+    if os.path.exists(dpath):
+        shutil.rmtree(dpath)
+    os.rename(tmp, dpath)
+
+def readManifest(dpath):
+    with open(os.path.join(dpath, manifestName)) as fh:
+        return json.load(fh)
+
+def saveNpy(dpath, data):
+    '''
+    Write data (a dictionary with DataType) to the store dpath.
+    An existing store is replaced.
+    '''
+
+    tmp = dpath.rstrip(os.sep) + '.tmp'
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(tmp)
+    arrays = dict(); attrs = dict()
+    for k, v in data.items():
+        if k == 'DataType':
+            continue
+        if isinstance(v, (str, int, float)):
+            attrs[k] = v
+            continue
+        v = np.asarray(v)
+        np.save(os.path.join(tmp, k + '.npy'), v)
+        arrays[k] = (v.shape, v.dtype)
+    _writeManifest(tmp, data['DataType'], data['param'], arrays, attrs)
+    _replace(tmp, dpath)
+
+def loadNpy(dpath, mmap=True):
+    '''
+    Load the store dpath.
+    mmap: return np.memmap views (read-only) instead of copies
+    '''
+
+    manifest = readManifest(dpath)
+    mode = 'r' if mmap else None
+    data = dict(DataType=manifest['DataType'])
+    data.update(manifest['attrs'])
+    for k in manifest['arrays']:
+        data[k] = np.load(os.path.join(dpath, k + '.npy'), mmap_mode=mode)
+    return data
+
+def loadMemberNpy(dpath, i, memberKeys):
+    '''
+    The ith member of an 'mts' store as 'sts' data (memmap views).
+    '''
+
+    data = loadNpy(dpath)
+    if data['DataType'] != 'mts':
+        print(dpath + ' is not mts data!')
+        return None
+    member = dict(DataType='sts', param=data['param'],
+                  tarray=data['tarray'], xyz=data['xyz'][i])
+    for k in memberKeys[1:]:
+        if k in data:
+            member[k[:-1]] = data[k][i]
+    return member
+
+def hdf5ToNpy(fpath, dpath, memberKeys=()):
+    '''
+    Convert an HDF5 data file to a store, one dataset at a time;
+    arrays in memberKeys are copied member by member.
+    '''
+
+    import h5py
+    tmp = dpath.rstrip(os.sep) + '.tmp'
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(tmp)
+    arrays = dict()
+    with h5py.File(fpath, 'r') as fh:
+        DataType = fh['xyz'].attrs['DataType']
+        for k, dset in fh.items():
+            # groups, e.g. the state of an unfinished Lckpt run
+            if not isinstance(dset, h5py.Dataset):
+                continue
+            arrays[k] = (dset.shape, dset.dtype)
+            out = np.lib.format.open_memmap(
+                    os.path.join(tmp, k + '.npy'), mode='w+',
+                    dtype=dset.dtype, shape=dset.shape)
+            if k in memberKeys and DataType == 'mts':
+                for i in range(dset.shape[0]):
+                    out[i] = dset[i]
+            else:
+                out[...] = dset[()]
+            out.flush(); del out
+        param = fh['param'][()]
+    _writeManifest(tmp, DataType, param, arrays, dict())
+    _replace(tmp, dpath)
+
+def npyToHdf5(dpath, fpath, memberKeys=()):
+    '''
+    Convert a store to an HDF5 data file;
+    arrays in memberKeys are chunked and copied member by member.
+    '''
+
+    import h5py
+    data = loadNpy(dpath)
+    DataType = data.pop('DataType')
+    with h5py.File(fpath, 'w') as fh:
+        for k, v in data.items():
+            if DataType == 'mts' and k in memberKeys:
+                dset = fh.create_dataset(k, shape=v.shape, dtype=v.dtype,
+                                         chunks=(1,) + v.shape[1:])
+                for i in range(v.shape[0]):
+                    dset[i] = v[i]
+            else:
+                fh[k] = v
+        fh['xyz'].attrs['DataType'] = DataType
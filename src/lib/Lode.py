@@ -1,8 +1,10 @@
 from __future__ import division
 import numpy as np
-import scipy as sp
-from scipy.integrate import odeint
-from scipy import linalg
+from . import Ldata as dm
+
+# scipy is imported inside the functions that use it (once per call,
+# not per time step), so that importing this module costs little
+# more than numpy.
 
 
 _trr = 1.0e-8
@@ -12,7 +14,7 @@ def normalizeVec(v):
     Normalize a vector
     '''
 
-    n = linalg.norm(v)
+    n = np.linalg.norm(v)
     if n > _trr: 
         v /= n
     return v
@@ -79,7 +81,69 @@ def ADF(xyz, t, sigma, r, b):
          (-2.0*sigma - xyz[2], 0.0, -2.0*xyz[0]),
          (xyz[1], 2.0*xyz[0], 0.0))
         )/2.
-    return asymj    
+    return asymj
+
+def FV(xyz, t, sigma, r, b):
+    '''
+    Vectorized F for many points at once.
+    xyz: (..., 3) array
+    return: (..., 3) array
+    '''
+
+    x = xyz[...,0]; y = xyz[...,1]; z = xyz[...,2]
+    dxdt = np.empty_like(xyz)
+    dxdt[...,0] = - sigma * x + sigma * y
+    dxdt[...,1] = -sigma * x - y - x * z
+    dxdt[...,2] = - b * z + x * y - b * (r + sigma)
+    return dxdt
+
+def DFV(xyz, t, sigma, r, b):
+    '''
+    Vectorized DF for many points at once.
+    xyz: (..., 3) array
+    return: (..., 3, 3) array
+    '''
+
+    x = xyz[...,0]; y = xyz[...,1]; z = xyz[...,2]
+    jcb = np.empty(xyz.shape + (3,), dtype=xyz.dtype)
+    jcb[...,0,0] = - sigma; jcb[...,0,1] = sigma; jcb[...,0,2] = 0.0
+    jcb[...,1,0] = -sigma - z; jcb[...,1,1] = -1.0; jcb[...,1,2] = - x
+    jcb[...,2,0] = y; jcb[...,2,1] = x; jcb[...,2,2] = -b
+    return jcb
+
+def SDFV(xyz, t, sigma, r, b):
+    '''
+    Vectorized SDF for many points at once.
+    xyz: (..., 3) array
+    return: (..., 3, 3) array
+    '''
+
+    x = xyz[...,0]; y = xyz[...,1]; z = xyz[...,2]
+    symj = np.zeros(xyz.shape + (3,), dtype=xyz.dtype)
+    symj[...,0,0] = - sigma
+    symj[...,1,1] = - 1.0
+    symj[...,2,2] = - b
+    symj[...,0,1] = symj[...,1,0] = - z/2.
+    symj[...,0,2] = symj[...,2,0] = y/2.
+    return symj
+
+def DFVdot(xyz, V, t, sigma, r, b):
+    '''
+    DF(xyz) @ V without forming DF.
+    xyz: (..., 3) array
+    V: (..., 3, k) array
+    return: (..., 3, k) array
+    '''
+
+    x = xyz[...,0,np.newaxis]
+    y = xyz[...,1,np.newaxis]
+    z = xyz[...,2,np.newaxis]
+    v0 = V[...,0,:]; v1 = V[...,1,:]; v2 = V[...,2,:]
+    dV = np.empty_like(V)
+    dV[...,0,:] = - sigma * v0 + sigma * v1
+    dV[...,1,:] = (-sigma - z) * v0 - v1 - x * v2
+    dV[...,2,:] = y * v0 + x * v1 - b * v2
+    return dV
 
 def arrangeEigVecs(prevEV, currEV):
     '''    
@@ -107,7 +171,7 @@ def arrangeEigVecs(prevEV, currEV):
         imin = np.argmin(np.abs(r))
         reordered_cE.append(_cE.pop(imin))
         _V = normalizeVec(_cV.pop(imin))
-        if linalg.norm(_V - pV[i]) > linalg.norm(_V + pV[i]):
+        if np.linalg.norm(_V - pV[i]) > np.linalg.norm(_V + pV[i]):
             reordered_cV.append(-_V)
         else:
             reordered_cV.append(_V)
@@ -115,23 +179,14 @@ def arrangeEigVecs(prevEV, currEV):
 
 
 
-def getEigVecs(xyz, param):
+def _initEigVecs(p, param):
     '''
-    input::
-        xyz: reference orbit
-        param: parameters
-
-    return::
-        evA: (eigenvals, vecs) for DF
-        evB: (eigenvals, vecs) for (DF + DF^T)/2
-            evA: (eA, vA)
-                eA: [ [e1(t0), e2(t0),...], [e1(t1), e2(t1),...], ... ]
-                vA: [ [v1(t0), v2(t0),...], [v1(t1), v2(t1),...], ... ]
-            evB: (eB, vB)
+    Eigenpairs of DF and SDF at the first point of an orbit,
+    sorted in the descending order; vb is made right-handed.
     '''
 
+    from scipy import linalg
     sigma, r, b = param
-    p = xyz[0]
     JA = DF(p, 0.0, sigma, r, b); JB = SDF(p, 0.0, sigma, r, b)
     ea, va = linalg.eig(JA); eb, vb = linalg.eigh(JB)
     vaT = []; vbT = []
@@ -140,8 +195,8 @@ def getEigVecs(xyz, param):
             vT.append(normalizeVec(v)) 
 
     #arrange eigenvalues in the desceindig order and arrange eigenvectors accordingly
-    sidx_a = sp.argsort(sp.real(-ea)) #sorted index for ea
-    sidx_b = sp.argsort(sp.real(-eb)) 
+    sidx_a = np.argsort(np.real(-ea)) #sorted index for ea
+    sidx_b = np.argsort(np.real(-eb)) 
     ea = ea[sidx_a]
     eb = eb[sidx_b]
     vaT = np.array(vaT)[sidx_a]
@@ -151,30 +206,243 @@ def getEigVecs(xyz, param):
     if linalg.det(vbT) < 0.0:
         vbT[2] = -vbT[2]
 
+    return ea, vaT, eb, vbT
 
-    eA = [ea]
-    eB = [eb]
-    vA = [vaT]
-    vB = [vbT]
+def iterEigVecs(xyz, param, start=0, prev=None):
+    '''
+    Yield the tracked eigenpairs ((eA, vA), (eB, vB)) of DF and SDF
+    at xyz[start], xyz[start + 1], ...
 
-    for p in xyz[1:]:
+    start, prev: to continue a tracking, prev is the pair yielded 
+        at xyz[start - 1]; not needed if start == 0
+    '''
+
+    from scipy import linalg
+    sigma, r, b = param
+    xyz = np.asarray(xyz, dtype=np.float64)
+    if start == 0:
+        ea, vaT, eb, vbT = _initEigVecs(xyz[0], param)
+        prev = ((ea, vaT), (eb, vbT))
+        yield prev
+        start = 1
+
+    prev = list(prev)
+    for p in xyz[start:]:
         JA = DF(p, 0.0, sigma, r, b); JB = SDF(p, 0.0, sigma, r, b)
 
-        for J, E, V in zip((JA, JB), (eA, eB), (vA, vB)):
+        for j, J in enumerate((JA, JB)):
             e, v = linalg.eig(J)
-            pe = E[-1]; pvT = V[-1]  # previous e, vT
-            e,v = arrangeEigVecs((pe, pvT), (e, v.T))
-            E.append(e); V.append(v)
-    eA, vA, eB, vB = map(np.array, (eA, vA, eB, vB))
+            prev[j] = arrangeEigVecs(prev[j], (e, v.T))
+        yield tuple(prev)
+
+def getEigVecs(xyz, param, precision='double'):
+    '''
+    input::
+        xyz: reference orbit
+        param: parameters
+        precision: 'double' or 'single'
+            precision of the returned arrays. 
+            The eigenproblems and the tracking by arrangeEigVecs
+            are always solved in float64.
+
+    return::
+        evA: (eigenvals, vecs) for DF
+        evB: (eigenvals, vecs) for (DF + DF^T)/2
+            evA: (eA, vA)
+                eA: [ [e1(t0), e2(t0),...], [e1(t1), e2(t1),...], ... ]
+                vA: [ [v1(t0), v2(t0),...], [v1(t1), v2(t1),...], ... ]
+            evB: (eB, vB)
+    '''
+
+    evs = list(iterEigVecs(xyz, param))
+    eA = [evA[0] for evA, evB in evs]
+    vA = [evA[1] for evA, evB in evs]
+    eB = [evB[0] for evA, evB in evs]
+    vB = [evB[1] for evA, evB in evs]
+    eA, vA, eB, vB = [dm.castArray(np.array(a), precision) 
+                            for a in (eA, vA, eB, vB)]
     return ( (eA, vA), (eB, vB) )
 
 
-def evolvL(data, tarray):
-    xyz = data['xyz']
+ivpMethods = ('RK45', 'RK23', 'DOP853', 'Radau', 'BDF', 'LSODA')
+solvers = ('odeint',) + ivpMethods + ('vrk4', 'vrk45')
+
+def _odeintM(mxyz, tarray, param, out, rtol, atol):
+    from scipy.integrate import odeint
+    for i, xyz in enumerate(mxyz):
+        out[i] = odeint(F, xyz, tarray, args=tuple(param), Dfun=DF,
+                        rtol=rtol, atol=atol)
+
+def _ivpM(mxyz, tarray, param, out, method, rtol, atol):
+    from scipy.integrate import solve_ivp
+    opt = dict()
+    if rtol is not None: opt['rtol'] = rtol
+    if atol is not None: opt['atol'] = atol
+    if method in ('Radau', 'BDF', 'LSODA'):
+        opt['jac'] = lambda t, xyz: DF(xyz, t, *param)
+    for i, xyz in enumerate(mxyz):
+        sol = solve_ivp(lambda t, xyz: F(xyz, t, *param),
+                        (tarray[0], tarray[-1]), xyz, method=method,
+                        t_eval=tarray, **opt)
+        if not sol.success:
+            raise RuntimeError(method + ': ' + sol.message)
+        out[i] = sol.y.T
+
+def _rk4M(mxyz, tarray, param, out, dt):
+    # fixed step RK4 for all members at once;
+    # each interval of tarray is divided into steps of at most dt
+    u = mxyz.copy()
+    out[:,0] = u
+    for k in range(1, len(tarray)):
+        T = tarray[k] - tarray[k-1]
+        n = max(1, int(np.ceil(T/dt - 1.0e-9)))
+        h = T/n
+        for i in range(n):
+            k1 = FV(u, 0.0, *param)
+            k2 = FV(u + 0.5*h*k1, 0.0, *param)
+            k3 = FV(u + 0.5*h*k2, 0.0, *param)
+            k4 = FV(u + h*k3, 0.0, *param)
+            u += h/6.0*(k1 + 2.0*k2 + 2.0*k3 + k4)
+        out[:,k] = u
+
+# Dormand-Prince 5(4) coefficients
+_dpA = (
+    (),
+    (1/5,),
+    (3/40, 9/40),
+    (44/45, -56/15, 32/9),
+    (19372/6561, -25360/2187, 64448/6561, -212/729),
+    (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+    (35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84)
+    )
+_dpE = (71/57600, 0.0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40)
+
+# dense output of Dormand-Prince (Shampine 1986): 
+# u(t + s h) = u(t) + h sum_j K_j sum_m _dpP[j][m] s^(m+1)
+_dpP = (
+    (1.0, -8048581381/2820520608, 8663915743/2820520608,
+        -12715105075/11282082432),
+    (0.0, 0.0, 0.0, 0.0),
+    (0.0, 131558114200/32700410799, -68118460800/10900136933,
+        87487479700/32700410799),
+    (0.0, -1754552775/470086768, 14199869525/1410260304,
+        -10690763975/1880347072),
+    (0.0, 127303824393/49829197408, -318862633887/49829197408,
+        701980252875/199316789632),
+    (0.0, -282668133/205662961, 2019193451/616988883,
+        -1453857185/822651844),
+    (0.0, 40617522/29380423, -110615467/29380423, 69997945/29380423)
+    )
+
+def _rk45M(mxyz, tarray, param, out, rtol, atol):
+    # adaptive Dormand-Prince for all members at once;
+    # the step size is shared and controlled by the worst member.
+    # Steps are not clipped to tarray: the points of tarray inside
+    # a step are filled by the dense output
+    u = mxyz.copy()
+    out[:,0] = u
+    f = FV(u, 0.0, *param)
+    h = 0.01*np.max(np.abs(u))/max(np.max(np.abs(f)), _trr)
+    t = tarray[0]; tend = tarray[-1]
+    eps = 1.0e-12*max(1.0, abs(tend))
+    k = 1
+    while k < len(tarray):
+        last = h >= tend - t - eps
+        if last:
+            h = tend - t
+        K = [f]
+        for a in _dpA[1:]:
+            du = sum(aj*Kj for aj, Kj in zip(a, K) if aj != 0.0)
+            K.append(FV(u + h*du, 0.0, *param))
+        unew = u + h*du
+        err = h*sum(ej*Kj for ej, Kj in zip(_dpE, K) if ej != 0.0)
+        scale = atol + rtol*np.maximum(np.abs(u), np.abs(unew))
+        enorm = np.max(np.sqrt(np.mean((err/scale)**2, axis=-1)))
+        if enorm <= 1.0:
+            tnew = tend if last else t + h
+            while k < len(tarray) and tarray[k] <= tnew + eps:
+                if tarray[k] >= tnew - eps:
+                    out[:,k] = unew
+                else:
+                    s = (tarray[k] - t)/h
+                    sp = (s, s**2, s**3, s**4)
+                    out[:,k] = u + h*sum(
+                                sum(p*q for p, q in zip(P, sp))*Kj 
+                                for P, Kj in zip(_dpP, K) if any(P))
+                k += 1
+            t = tnew; u = unew; f = K[-1]
+            fac = 5.0 if enorm == 0.0 else min(5.0, 0.9*enorm**-0.2)
+        else:
+            fac = max(0.2, 0.9*enorm**-0.2)
+        h *= fac
+
+def integrate(
+        mxyz, 
+        tarray, 
+        param, 
+        solver='odeint', 
+        rtol=None, 
+        atol=None, 
+        dt=1.0e-3, 
+        out=None
+        ):
+    '''
+    Integrate the Lorenz Eq from many initial points.
+
+    input::
+        mxyz: (N, 3) initial points
+        tarray: output times; tarray[0] is the initial time
+        param: (sigma, r, b)
+        solver: one of solvers
+            'odeint': scipy.integrate.odeint (LSODA) with Dfun=DF
+            'RK45', ..., 'LSODA': scipy.integrate.solve_ivp methods
+            'vrk4': vectorized fixed step RK4 with step dt
+            'vrk45': vectorized adaptive Dormand-Prince 5(4)
+        rtol, atol: tolerances; None uses the defaults of the backend
+            (vrk45: rtol=1.0e-6, atol=1.0e-9); ignored by vrk4
+        dt: maximal step of vrk4; each interval of tarray is split
+            into equal steps, so the spacing of tarray also caps it
+        out: (N, T, 3) array to store the result in (any float dtype)
+
+    return::
+        out: (N, T, 3) array
+    '''
+
+    mxyz = np.array(mxyz, dtype=np.float64, ndmin=2)
+    tarray = np.asarray(tarray, dtype=np.float64)
+    param = tuple(float(p) for p in param)
+    if out is None:
+        out = np.empty((len(mxyz), len(tarray), 3))
+
+    if solver == 'odeint':
+        _odeintM(mxyz, tarray, param, out, rtol, atol)
+    elif solver in ivpMethods:
+        _ivpM(mxyz, tarray, param, out, solver, rtol, atol)
+    elif solver == 'vrk4':
+        _rk4M(mxyz, tarray, param, out, dt)
+    elif solver == 'vrk45':
+        _rk45M(mxyz, tarray, param, out,
+                1.0e-6 if rtol is None else rtol,
+                1.0e-9 if atol is None else atol)
+    else:
+        raise ValueError('unknown solver: ' + str(solver))
+    return out
+
+
+def evolvL(data, tarray, precision='double', solver='odeint', **opt):
+    '''
+    Integrate a single snap shot over tarray.
+    precision: 'double' or 'single'
+        the orbit is integrated in float64 and 
+        stored in the dtype of precision.
+    solver, opt: see integrate (rtol, atol, dt)
+    '''
+
+    xyz = np.asarray(data['xyz'], dtype=np.float64)
     param = data['param']
-    sigma, r, b = param
 
-    xyzsol = odeint(F, xyz, tarray, args=(sigma, r, b), Dfun=DF)
+    xyzsol = integrate(xyz, tarray, param, solver, **opt)[0]
+    xyzsol = dm.castArray(xyzsol, precision)
 
     tsdata = dict( 
                     DataType = 'sts',
@@ -186,15 +454,21 @@ def evolvL(data, tarray):
     return tsdata
 
 
-def evolvLM(mdata, tarray):
-    mxyz = mdata['xyz']
+def evolvLM(mdata, tarray, precision='double', solver='odeint', **opt):
+    '''
+    Integrate a multiple snap shot over tarray.
+    precision: 'double' or 'single'
+        each member is integrated in float64 and 
+        stored in an (N,T,3) array of the dtype of precision.
+    solver, opt: see integrate (rtol, atol, dt)
+    '''
+
+    mxyz = np.asarray(mdata['xyz'], dtype=np.float64)
     param = mdata['param']
-    sigma, r, b = param
 
-    mxyzsol = []
-    for xyz in mxyz:
-        xyzsol = odeint(F, xyz, tarray, args=(sigma, r, b), Dfun=DF)
-        mxyzsol.append(xyzsol)
+    rdtype = dm.precisions[precision][0]
+    mxyzsol = np.empty((len(mxyz), len(tarray), 3), dtype=rdtype)
+    integrate(mxyz, tarray, param, solver, out=mxyzsol, **opt)
 
     tsdata = dict(                    
                     DataType = 'mts',
@@ -205,17 +479,206 @@ def evolvLM(mdata, tarray):
 
     return tsdata
 
-def appendEigVecs(data):
+def modalDecomposition(data, cond_max=1.0e8):
+    '''
+    Decompose the deviations of the perturbed orbits from the 
+    reference orbit onto the eigenbasis of DF along the reference.
+
+    At each time the basis is 
+        P = [Re vc, Im vc, Re vr]  (columns),
+    where vc is the eigenvector of the complex eigenvalue with Im > 0
+    and vr that of the real one. The slots of eigVecDF follow the
+    eigenvalues continuously in time (see arrangeEigVecs), so vc and vr
+    are picked by their eigenvalues at each time, not by slot.
+    The deviation d is written as
+        d = P y = w12 + w3,  w12 = y1 Re vc + y2 Im vc,  w3 = y3 Re vr.
+    All members and time steps are solved at once; 
+    P is factorized once per time step and never inverted.
+
+    input::
+        data: 'mts' data with eigValDF and eigVecDF (see appendEigVecs)
+        cond_max: P with a larger condition number is flagged singular
+
+    return:: dict
+        y: (N-1, T, 3) modal coordinates
+        w12, w3: (N-1, T, 3) the parts in the plane of vc (y1, y2)
+            and along vr (y3)
+        nrm12, nrm3: (N-1, T) their norms
+        cond: (T,) condition number of P
+        singular: (T,) True where all the eigenvalues are real,
+            cond > cond_max or P is not finite;
+            y, w12, w3, nrm12 and nrm3 are NaN there
+    '''
+
+    xyz = np.asarray(data['xyz'], dtype=np.float64)
+    vA = np.asarray(data['eigVecDF'], dtype=np.complex128)
+    imE = np.imag(np.asarray(data['eigValDF'], dtype=np.complex128))
+    diff = xyz[1:] - xyz[0][np.newaxis]
+
+    # slots of the complex (Im > 0) and the real eigenvalue
+    ic = np.argmax(imE, axis=-1)
+    ir = np.argmin(np.abs(imE), axis=-1)
+    complexPair = imE[np.arange(len(imE)), ic] > 0
+    vc = vA[np.arange(len(vA)), ic]
+    vr = vA[np.arange(len(vA)), ir]
+
+    P = np.stack([np.real(vc), np.imag(vc), np.real(vr)], axis=-1)
+    finite = complexPair & np.all(np.isfinite(P), axis=(-2, -1))
+    cond = np.full(len(P), np.inf)
+    cond[finite] = np.linalg.cond(P[finite])
+    singular = ~(cond <= cond_max)
+    ok = ~singular
+
+    y = np.full(diff.shape, np.nan)
+    # (T, 3, N-1): one right-hand side per member
+    rhs = np.transpose(diff[:,ok], (1, 2, 0))
+    y[:,ok] = np.transpose(np.linalg.solve(P[ok], rhs), (2, 0, 1))
+
+    w12 = (y[...,0,np.newaxis]*P[np.newaxis,:,:,0]
+           + y[...,1,np.newaxis]*P[np.newaxis,:,:,1])
+    w3 = y[...,2,np.newaxis]*P[np.newaxis,:,:,2]
+
+    return dict(
+                y = y,
+                w12 = w12,
+                w3 = w3,
+                nrm12 = np.linalg.norm(w12, axis=-1),
+                nrm3 = np.linalg.norm(w3, axis=-1),
+                cond = cond,
+                singular = singular
+                )
+
+def arrangeEigVecsM(prevEV, currEV):
+    '''
+    arrangeEigVecs for N members at once.
+
+    input:
+        prevEV: (pE, pV), pE: (N, 3), pV: (N, 3, 3)
+            pV[n, i]: the ith eigenvector of the nth member
+        currEV: (cE, cV) of the same shapes
+
+    output:
+        reordered_cE, reordered_cV
+    '''
+
+    pE, pV = prevEV; cE, cV = currEV
+    rows = np.arange(len(cE))
+    avail = np.ones(cE.shape, dtype=bool)
+    reordered_cE = np.empty_like(cE)
+    reordered_cV = np.empty_like(cV)
+    for i in range(cE.shape[1]):
+        r = np.abs(pE[:,i,np.newaxis] - cE)
+        r[~avail] = np.inf
+        imin = np.argmin(r, axis=1)
+        avail[rows, imin] = False
+        reordered_cE[:,i] = cE[rows, imin]
+        _V = cV[rows, imin]
+        n = np.linalg.norm(_V, axis=-1)[:,np.newaxis]
+        _V = np.where(n > _trr, _V/np.where(n > _trr, n, 1.0), _V)
+        flip = (np.linalg.norm(_V - pV[:,i], axis=-1) 
+                > np.linalg.norm(_V + pV[:,i], axis=-1))
+        reordered_cV[:,i] = np.where(flip[:,np.newaxis], -_V, _V)
+    return reordered_cE, reordered_cV
+
+def iterEigVecsM(mxyz, param, tchunk=256, start=0, prev=None):
+    '''
+    iterEigVecs for every member of an ensemble: yield
+    ((eA, vA), (eB, vB)) of shapes (N, 3) and (N, 3, 3)
+    at mxyz[:, start], mxyz[:, start + 1], ...
+    The eigenproblems are solved in batches of (N, tchunk) matrices.
+    '''
+
+    sigma, r, b = param
+    mxyz = np.asarray(mxyz, dtype=np.float64)
+    T = mxyz.shape[1]
+    if start == 0:
+        # the same as getEigVecs
+        ea, vaT, eb, vbT = [np.array(a) for a in 
+                        zip(*[_initEigVecs(p, param) for p in mxyz[:,0]])]
+        prev = ((ea, vaT), (eb, vbT))
+        yield prev
+        start = 1
+
+    prev = list(prev)
+    for t0 in range(start, T, tchunk):
+        t1 = min(t0 + tchunk, T)
+        p = mxyz[:,t0:t1]
+        ca = np.linalg.eig(DFV(p, 0.0, sigma, r, b))
+        cb = np.linalg.eig(SDFV(p, 0.0, sigma, r, b))
+        for k in range(t1 - t0):
+            for j, (ce, cv) in enumerate((ca, cb)):
+                prev[j] = arrangeEigVecsM(prev[j],
+                        (ce[:,k].astype(np.complex128),
+                         np.swapaxes(cv[:,k], -1, -2)))
+            yield tuple(prev)
+
+def getEigVecsM(mxyz, param, precision='double', tchunk=256):
+    '''
+    getEigVecs for every member of an ensemble.
+    The eigenproblems are solved in batches of (N, tchunk) matrices,
+    the tracking by arrangeEigVecsM is vectorized over the members.
+
+    input::
+        mxyz: (N, T, 3) orbits
+        param: parameters
+        precision: 'double' or 'single' (see getEigVecs)
+        tchunk: number of time steps solved at once
+
+    return::
+        evA: (eA, vA) for DF, eA: (N, T, 3), vA: (N, T, 3, 3)
+        evB: (eB, vB) for (DF + DF^T)/2
+            vA[n, t, i]: the ith eigenvector of the nth member at t
+    '''
+
+    mxyz = np.asarray(mxyz, dtype=np.float64)
+    N, T = mxyz.shape[:2]
+    rdtype, cdtype = dm.precisions[precision]
+    eA = np.empty((N, T, 3), dtype=cdtype)
+    vA = np.empty((N, T, 3, 3), dtype=cdtype)
+    eB = np.empty((N, T, 3), dtype=cdtype)
+    vB = np.empty((N, T, 3, 3), dtype=rdtype)
+
+    for k, (evA, evB) in enumerate(iterEigVecsM(mxyz, param, tchunk)):
+        eA[:,k], vA[:,k] = evA
+        eB[:,k], vB[:,k] = evB
+
+    return ( (eA, vA), (eB, vB) )
+
+def appendEigVecs(data, members=False):
+    '''
+    Append the eigenvalues and eigenvectors of DF and SDF along
+    the orbit as eigValDF, eigVecDF, eigValSymDF and eigVecSymDF.
+    For 'mts' data these are of the reference orbit data['xyz'][0].
+
+    members: for 'mts' data, also append eigValDFM, eigVecDFM,
+        eigValSymDFM and eigVecSymDFM of every member, 
+        (N,T,3) and (N,T,3,3) arrays computed by getEigVecsM;
+        the reference arrays are then their first member.
+    '''
+
     # if 'evA' in data:
     #     print('The data alsready has evA and evB.')
     #     return False
+
+    if members and data['DataType'] == 'mts':
+        evA, evB = getEigVecsM(data['xyz'], data['param'], 
+                               dm.getPrecision(data))
+        data['eigValDFM'] = evA[0]
+        data['eigVecDFM'] = evA[1]
+        data['eigValSymDFM'] = evB[0]
+        data['eigVecSymDFM'] = evB[1]
+        data['eigValDF'] = evA[0][0]
+        data['eigVecDF'] = evA[1][0]
+        data['eigValSymDF'] = evB[0][0]
+        data['eigVecSymDF'] = evB[1][0]
+        return
     
     if data['DataType'] == 'sts':
         xyz = data['xyz']
     elif data['DataType'] == 'mts':
         xyz = data['xyz'][0]
         
-    evA, evB = getEigVecs(xyz, data['param'])
+    evA, evB = getEigVecs(xyz, data['param'], dm.getPrecision(data))
 
     data['eigValDF'] = evA[0]
     data['eigVecDF'] = evA[1]
@@ -223,3 +686,157 @@ def appendEigVecs(data):
     data['eigVecSymDF'] = evB[1]
 
 
+
+
+#
+# time-dependent linear systems y' = A(t) y
+#
+
+def rotA(t, alpha, beta, omega):
+    '''
+    A(t) of the rotating 2D example (fig4paper-ex2), u' = A(t) u:
+        theta = 3 pi/8 + pi/8 cos(omega t)
+        A = [[alpha + beta cos(theta), beta (sin(theta) - 2/sin(theta))],
+             [beta sin(theta),         alpha - beta cos(theta)]]
+
+    t: (T,) array
+    alpha, beta, omega: scalars or (P,) arrays
+    return: (P, T, 2, 2) array; (T, 2, 2) for scalars
+    '''
+
+    t = np.asarray(t, dtype=np.float64)
+    alpha, beta, omega = [np.asarray(p, dtype=np.float64)[...,np.newaxis]
+                            for p in (alpha, beta, omega)]
+    theta = 3.0*np.pi/8.0 + np.pi/8.0*np.cos(omega*t)
+    cos = np.cos(theta)
+    sin = np.sin(theta)
+    A = np.empty(theta.shape + (2, 2))
+    A[...,0,0] = alpha + beta*cos
+    A[...,0,1] = beta*(sin - 2.0/sin)
+    A[...,1,0] = beta*sin
+    A[...,1,1] = alpha - beta*cos
+    return A
+
+def linStepRK4(Agrid, h):
+    '''
+    One-step propagators of the classical RK4 scheme for y' = A(t) y.
+
+    Agrid: (..., 2n+1, d, d) A(t) at t0, t0 + h/2, t0 + h, ..., t0 + nh
+    h: step
+    return: R (..., n, d, d);
+        y(t0 + (k+1)h) = R[..., k, :, :] @ y(t0 + kh)
+    '''
+
+    A0 = Agrid[...,0:-1:2,:,:]
+    Ah = Agrid[...,1::2,:,:]
+    A1 = Agrid[...,2::2,:,:]
+    I = np.eye(Agrid.shape[-1])
+    K1 = A0
+    K2 = Ah @ (I + 0.5*h*K1)
+    K3 = Ah @ (I + 0.5*h*K2)
+    K4 = A1 @ (I + h*K3)
+    return I + h/6.0*(K1 + 2.0*K2 + 2.0*K3 + K4)
+
+def linPropagate(R, y0):
+    '''
+    Propagate initial vectors with the step propagators R.
+
+    R: (..., n, d, d) output of linStepRK4
+    y0: (m, d) or (..., m, d) initial vectors
+    return: (..., n+1, m, d) array
+    '''
+
+    n, d = R.shape[-3], R.shape[-1]
+    y = np.broadcast_to(np.asarray(y0, dtype=np.float64), 
+                        R.shape[:-3] + np.shape(y0)[-2:])
+    out = np.empty(y.shape[:-2] + (n + 1,) + y.shape[-2:])
+    out[...,0,:,:] = y
+    for k in range(n):
+        out[...,k+1,:,:] = out[...,k,:,:] @ np.swapaxes(R[...,k,:,:], -1, -2)
+    return out
+
+def _norm2(Phi):
+    # spectral norms of (..., d, d) matrices
+    if Phi.shape[-1] != 2:
+        return np.linalg.svd(Phi, compute_uv=False)[...,0]
+    fro2 = np.sum(Phi**2, axis=(-2, -1))
+    det = Phi[...,0,0]*Phi[...,1,1] - Phi[...,0,1]*Phi[...,1,0]
+    disc = np.sqrt(np.maximum(fro2**2 - 4.0*det**2, 0.0))
+    return np.sqrt((fro2 + disc)/2.0)
+
+def linGrowth(R, y0=None):
+    '''
+    Maximal growth along the grid without storing the solutions.
+
+    R: (..., n, d, d) output of linStepRK4
+    y0: (m, d) or (..., m, d) initial vectors, or None
+
+    return::
+        growth: (..., m) max_k |y_k|/|y_0| for the vectors y0;
+            if y0 is None, (...,) max_k |Phi_k|_2 for the fundamental
+            matrix Phi_k = R_{k-1} ... R_0, i.e. the maximal growth
+            over all initial vectors
+        kmax: the step index k of the maximum
+    '''
+
+    n, d = R.shape[-3], R.shape[-1]
+    if y0 is None:
+        y = np.broadcast_to(np.eye(d), R.shape[:-3] + (d, d))
+        norm = lambda y: _norm2(y)
+    else:
+        y = np.broadcast_to(np.asarray(y0, dtype=np.float64),
+                            R.shape[:-3] + np.shape(y0)[-2:])
+        y = y/np.linalg.norm(y, axis=-1, keepdims=True)
+        norm = lambda y: np.linalg.norm(y, axis=-1)
+    growth = norm(y)
+    kmax = np.zeros(growth.shape, dtype=np.int64)
+    for k in range(n):
+        Rk = R[...,k,:,:]
+        if y0 is None:
+            y = Rk @ y
+        else:
+            y = y @ np.swapaxes(Rk, -1, -2)
+        g = norm(y)
+        larger = g > growth
+        growth = np.where(larger, g, growth)
+        kmax[larger] = k + 1
+    return growth, kmax
+
+def rotGrowth(params, tend=20.0, dt=0.05, y0=((1.0, 0.0),), pchunk=1024):
+    '''
+    Maximal growth of the rotating 2D example for many parameters.
+
+    params: (P, 3) array of (alpha, beta, omega)
+    tend: length of the time interval [0, tend]
+    dt: RK4 step; the growth is taken on the grid k*dt
+    y0: (m, 2) initial vectors
+    pchunk: parameter sets handled at once; the memory used is
+        about pchunk*(tend/dt)*300 bytes
+
+    return: dict with
+        tarray: (n+1,) grid
+        growth, tgrowth: (P, m) max_t |u(t)|/|u(0)| and its time
+        optgrowth, toptgrowth: (P,) max_t |Phi(t)|_2 over all initial
+            vectors and its time
+    '''
+
+    params = np.array(params, dtype=np.float64, ndmin=2)
+    P = len(params)
+    n = int(round(tend/dt))
+    tgrid = np.linspace(0.0, n*dt, 2*n + 1)
+    tarray = tgrid[::2]
+    m = len(y0)
+
+    growth = np.empty((P, m)); tgrowth = np.empty((P, m))
+    optgrowth = np.empty(P); toptgrowth = np.empty(P)
+    for p0 in range(0, P, pchunk):
+        p1 = min(p0 + pchunk, P)
+        alpha, beta, omega = params[p0:p1].T
+        R = linStepRK4(rotA(tgrid, alpha, beta, omega), dt)
+        g, k = linGrowth(R, y0)
+        growth[p0:p1] = g; tgrowth[p0:p1] = tarray[k]
+        g, k = linGrowth(R)
+        optgrowth[p0:p1] = g; toptgrowth[p0:p1] = tarray[k]
+
+    return dict(tarray=tarray, growth=growth, tgrowth=tgrowth,
+                optgrowth=optgrowth, toptgrowth=toptgrowth)
@@ -0,0 +1,136 @@
+'''
+A small file-based stage scheduler.
+
+A stage is a picklable function with the files it reads (inputs)
+and the files it writes (outputs).
+A stage depends on every stage that produces one of its inputs.
+runStages runs independent stages concurrently in worker processes,
+starts a stage as soon as all stages it depends on are finished,
+and skips a stage whose outputs are newer than its inputs.
+'''
+
+import os
+
+
+class Stage(object):
+    def __init__(self, name, func, inputs=(), outputs=(),
+                    args=(), kwargs=None):
+        '''
+        name: unique stage name
+        func: module level function (run in a worker process)
+        inputs, outputs: lists of file paths
+        args, kwargs: arguments of func
+        '''
+
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+
+    def upToDate(self):
+        '''
+        True if every output exists and is not older than any input.
+        '''
+
+        if not all(os.path.exists(f) for f in self.outputs):
+            return False
+        if not self.inputs:
+            return True
+        tin = max(os.path.getmtime(f) for f in self.inputs)
+        tout = min(os.path.getmtime(f) for f in self.outputs)
+        return tout >= tin
+
+    def __repr__(self):
+        return 'Stage({0})'.format(self.name)
+
+
+def _run(func, args, kwargs):
+    func(*args, **kwargs)
+
+def stageDeps(stages):
+    '''
+    Return {name: set of names of the stages it depends on}.
+    '''
+
+    producer = dict()
+    for s in stages:
+        for f in s.outputs:
+            producer[os.path.normpath(f)] = s.name
+    deps = dict()
+    for s in stages:
+        deps[s.name] = set(producer[os.path.normpath(f)]
+                        for f in s.inputs
+                        if os.path.normpath(f) in producer) - {s.name}
+    return deps
+
+def runStages(stages, nproc=None, force=False):
+    '''
+    Run stages concurrently in the order of their file dependencies.
+
+    stages: list of Stage
+    nproc: number of worker processes (None: os.cpu_count())
+    force: run every stage even if it is up to date
+
+    return: {name: 'done' | 'skipped' | 'failed' | 'blocked'}
+        'blocked' stages were not run because a stage they depend on
+        failed or one of their inputs is missing.
+    '''
+
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    byname = dict((s.name, s) for s in stages)
+    deps = stageDeps(stages)
+    status = dict()
+    running = dict()
+
+    def ready(name):
+        return all(status.get(d) in ('done', 'skipped')
+                    for d in deps[name])
+
+    def blocked(name):
+        return any(status.get(d) in ('failed', 'blocked')
+                    for d in deps[name])
+
+    with ProcessPoolExecutor(nproc) as pool:
+        while len(status) < len(stages):
+            nresolved = len(status) + len(running)
+            for name, s in byname.items():
+                if name in status or name in running.values():
+                    continue
+                if blocked(name):
+                    status[name] = 'blocked'
+                    print(name + ': blocked')
+                elif ready(name):
+                    missing = [f for f in s.inputs if not os.path.exists(f)]
+                    if missing:
+                        status[name] = 'blocked'
+                        print(name + ': missing ' + ', '.join(missing))
+                    elif (not force) and s.upToDate():
+                        status[name] = 'skipped'
+                        print(name + ': up to date')
+                    else:
+                        print(name + ': start')
+                        fut = pool.submit(_run, s.func, s.args, s.kwargs)
+                        running[fut] = name
+            if len(status) == len(stages):
+                break
+            if not running:
+                if len(status) == nresolved:
+                    # dependency cycle
+                    for name in byname:
+                        if name not in status:
+                            status[name] = 'blocked'
+                            print(name + ': blocked (cycle)')
+                continue
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                if fut.exception() is None:
+                    status[name] = 'done'
+                    print(name + ': done')
+                else:
+                    status[name] = 'failed'
+                    print(name + ': failed ({0!r})'.format(fut.exception()))
+
+    return status
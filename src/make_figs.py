@@ -0,0 +1,656 @@
+
+# coding: utf-8
+
+'''
+Render the figures of the paper without the notebooks.
+
+    $ python make_figs.py               # figures that are out of date
+    $ python make_figs.py -j 4          # with 4 worker processes
+    $ python make_figs.py --force       # every figure
+    $ python make_figs.py figGR figOMG  # only these
+
+The data files are loaded once and the arrays derived from them
+(deviations, A1/A2, the rotation vectors, spherical coordinates, ...)
+are computed once in the main process; worker processes receive them
+and draw the figures concurrently.
+
+A figure is skipped if its stamp matches the one recorded in
+figs/figstamps.json. The stamp covers the size and mtime of the data
+files, the source of the figure function, of every quantity it uses
+and of the shared helpers (cart2spher, ce_rhs, annotatePanel),
+the ranges upto1h and upto3, conf_fig.py, lib/Ldraw.py and lib/Lode.py.
+'''
+
+from os import path
+import argparse, hashlib, inspect, json, os
+
+import numpy as np
+import lib.Ldata as dm
+import lib.Lode as ode
+from conf_fig import *
+
+figdir = path.join('..', 'figs')
+stampfn = path.join(figdir, 'figstamps.json')
+codefiles = ['conf_fig.py', path.join('lib', 'Ldraw.py'),
+             path.join('lib', 'Lode.py')]
+
+datafiles = dict(
+    sdata = path.join('data', 's_orbit.hdf5'),
+    lmdata = path.join('data', 'lm_orbit.hdf5'),
+    )
+
+upto1h = slice(0, 301)
+upto3 = slice(0, 601)
+
+
+#
+# derived quantities
+#
+# name: (function, names of its arguments)
+# the arguments are data files (datafiles) or other quantities
+#
+
+def cart2spher(v):
+    '''
+    (r, theta, phi) of vectors v: (..., 3) array
+    '''
+
+    r = np.linalg.norm(v, axis=-1)
+    rho = np.linalg.norm(v[...,:2], axis=-1)
+    theta = np.arccos(v[...,2]/r)
+    phi = np.arccos(v[...,0]/rho)
+    return np.stack((r, theta, phi), axis=-1)
+
+def q_tarray(lmdata):
+    return lmdata['tarray']
+
+def q_evalB(lmdata):
+    return np.real(lmdata['eigValSymDF'])
+
+def q_diff(lmdata):
+    orbits = lmdata['xyz']
+    return orbits[1:] - orbits[:1]
+
+def q_normDiff(diff):
+    return np.sqrt(np.sum(diff**2, axis=-1))
+
+def q_nrmPhi(lmdata):
+    '''
+    norms of the unstable and the stable components
+    of the first deviation (see Lode.modalDecomposition): (2, T) array
+    '''
+
+    md = ode.modalDecomposition(dict(
+                xyz = lmdata['xyz'][:2,upto1h],
+                eigValDF = lmdata['eigValDF'][upto1h],
+                eigVecDF = lmdata['eigVecDF'][upto1h]))
+    return np.array((md['nrm12'][0], md['nrm3'][0]))
+
+def q_A12(lmdata):
+    '''
+    A1 and A2 in the frame of the eigenvectors of SDF: (2, T-1, 3, 3)
+    '''
+
+    tarray = lmdata['tarray']; dt = tarray[1] - tarray[0]
+    E = lmdata['eigVecSymDF']
+    dE = E[1:] - E[:-1]
+    E = E[:-1]
+    J = ode.DFV(lmdata['xyz'][0,:-1], 0.0, *lmdata['param'])
+    ADF = (J - np.swapaxes(J, -1, -2))/2.0
+    ET = np.swapaxes(E, -1, -2)
+    A2 = E @ ADF @ ET
+    A1 = - E @ (np.swapaxes(dE, -1, -2)/dt) + A2
+    return np.array((A1, A2))
+
+def q_omega12(A12):
+    '''
+    the unit rotation vectors of A1 and A2: (2, 3, T-1)
+    '''
+
+    omega = np.array((A12[:,:,1,2], -A12[:,:,0,2], A12[:,:,0,1]))
+    omega = np.swapaxes(omega, 0, 1)
+    return omega/np.linalg.norm(omega, axis=1)[:,np.newaxis]
+
+def q_gab12(A12, omega12, evalB):
+    '''
+    (gamma, alpha, beta) of A1 and A2: (2, 3, T-1)
+    '''
+
+    _omega = np.array((A12[:,:,1,2], -A12[:,:,0,2], A12[:,:,0,1]))
+    gamma = np.linalg.norm(_omega, axis=0)
+    beta = np.sum(evalB[:-1].T*(omega12**2), axis=1)
+    alpha = (np.sum(evalB[:-1].T, axis=0) - beta)/2.0
+    return np.stack((gamma, alpha, beta), axis=1)
+
+def q_sphcB(lmdata):
+    return cart2spher(lmdata['eigVecSymDF'])
+
+def q_sphcOmega2(omega12):
+    return cart2spher(omega12[1].T)
+
+def q_maxRealEig(lmdata):
+    return np.max(np.real(lmdata['eigValDF']), axis=-1)
+
+def q_grateDiff(normDiff, tarray):
+    dt = tarray[1] - tarray[0]
+    lnd = np.log(normDiff)
+    return (lnd[:,1:] - lnd[:,:-1])/dt
+
+def ce_rhs(y, t, alpha, beta, omega):
+    theta = (3.0*np.pi/8.0
+             + np.pi/8.0*np.cos(omega*t))
+    cos = np.cos(theta)
+    sin = np.sin(theta)
+    return (
+        (alpha + beta*cos)*y[0] +
+            beta*(sin - 2.0/sin)*y[1],
+        beta*sin*y[0] + (alpha - beta*cos)*y[1]
+            )
+
+def q_ce():
+    '''
+    the rotating 2D example (fig4paper-ex2): (t, y)
+    '''
+
+    from scipy.integrate import odeint
+    t = np.linspace(0., 20., 401)
+    y = odeint(ce_rhs, [1.0, 0.0], t, args=(-0.1, 1.0, 2.0))
+    return t, y
+
+quantities = dict(
+    tarray = (q_tarray, ('lmdata',)),
+    evalB = (q_evalB, ('lmdata',)),
+    diff = (q_diff, ('lmdata',)),
+    normDiff = (q_normDiff, ('diff',)),
+    nrmPhi = (q_nrmPhi, ('lmdata',)),
+    A12 = (q_A12, ('lmdata',)),
+    omega12 = (q_omega12, ('A12',)),
+    gab12 = (q_gab12, ('A12', 'omega12', 'evalB')),
+    sphcB = (q_sphcB, ('lmdata',)),
+    sphcOmega2 = (q_sphcOmega2, ('omega12',)),
+    maxRealEig = (q_maxRealEig, ('lmdata',)),
+    grateDiff = (q_grateDiff, ('normDiff', 'tarray')),
+    ce = (q_ce, ()),
+    )
+
+
+#
+# figures
+#
+# each function returns a matplotlib figure
+#
+
+def annotatePanel(ax, label, xy=(1.05, 0.95)):
+    ax.annotate(label,
+                xy,
+                xycoords='axes fraction',
+                va="top",
+                ha="left",
+                fontsize=16)
+
+def figOne(sdata):
+    import lib.Ldraw as vis
+    from matplotlib import gridspec
+    frameOne = vis.LFrame(sdata,
+                        figsize=(width_1col, 1.2*width_1col),
+                        dpi=100
+                       )
+    gsOne = gridspec.GridSpec(1,1)
+    p3pane = vis.PanePhase3D(frameOne, gsOne[0], **p3attr)
+    p3pane.setBG(**bgprop)
+    p3pane.set_line_prop([p3line_prop])
+    p3pane.set_line_prop([{'marker': '', 'markersize': 0.0}])
+    p3pane.plotTrail([0.0, 4.0])
+    p3pane.ax.xaxis.set_tick_params(pad=3)
+    p3pane.ax.yaxis.set_tick_params(pad=-2)
+    gsOne.tight_layout(frameOne.fig)
+    return frameOne.fig
+
+def figMul(lmdata):
+    import lib.Ldraw as vis
+    from matplotlib import gridspec
+    nfold = len(lmdata['xyz'])
+    frameMul = vis.LFrame(lmdata,
+                        figsize=(1.4*width_1col, width_1col),
+                        dpi=100
+                       )
+    gsMul = gridspec.GridSpec(2,3)
+    tsnaps = [0.0, 3.1, 3.4, 4.0, 4.6, 5.4]
+    annos = ['(a)', '(b)', '(c)', '(d)', '(e)', '(f)']
+    gss = [gsMul[i,j] for i in range(2) for j in range(3)]
+    for gs, t, a in zip(gss, tsnaps, annos):
+        p = vis.PanePhase3DM(frameMul, gs, **p3attr)
+        p.ax.xaxis.set_tick_params(pad=3)
+        p.ax.yaxis.set_tick_params(pad=-2)
+        p.setBG(**bgprop)
+        p.set_line_prop([p3line_prop]*nfold)
+        p.set_line_prop([{'marker': 'o', 'markersize': 3.0}]*nfold)
+        p.plotSnap(t)
+        p.set_label(a, (1.15, 0.9))
+        p._label.set_fontsize(14)
+    gsMul.tight_layout(frameMul.fig,
+                       pad=3.0,
+                       rect=[0., 0., 0.95, 1.0]
+                      )
+    return frameMul.fig
+
+def figEigSym(tarray, evalB):
+    import matplotlib.pyplot as plt
+    from matplotlib import gridspec
+    fig = plt.figure(figsize=(0.8*width_1col, 0.5*width_1col), dpi=180)
+    gs = gridspec.GridSpec(1,1)
+    ax = fig.add_subplot(gs[0])
+    for i in range(3):
+        ax.plot(tarray[upto3], evalB[upto3,i])
+    ax.set_xlabel(r'$t$')
+    ax.set_ylabel('eigenvalue')
+    for i, tidx, label, va, offset in zip(
+                        [0,1,2],
+                        [160,280,340],
+                        [r'$\mu_1$', r'$\mu_2$', r'$\mu_3$'],
+                        ['bottom', 'top', 'bottom'],
+                        [(-8,4), (0,-3),(-8,4)]):
+        ax.annotate(label,
+                    xy=(tarray[tidx], evalB[tidx,i]),
+                    xycoords='data',
+                    xytext=offset,
+                    textcoords='offset points',
+                    va=va,
+                    ha="center",
+                    fontsize=12)
+    ax.grid(True)
+    gs.tight_layout(fig)
+    return fig
+
+def figNormDiff(tarray, normDiff):
+    import matplotlib.pyplot as plt
+    from matplotlib import gridspec
+    fig = plt.figure(figsize=(0.8*width_1col, 0.5*width_1col), dpi=140)
+    gs = gridspec.GridSpec(1,1)
+    ax = fig.add_subplot(gs[0])
+    for _diff in normDiff:
+        ax.plot(tarray[upto3], _diff[upto3])
+    ax.set_ylim([0., 1.5])
+    ax.set_xlim([0., 3.])
+    ax.set_xlabel(r'$t$')
+    ax.set_ylabel('deviation')
+    ax.grid(True)
+    gs.tight_layout(fig)
+    return fig
+
+def figEigA(lmdata):
+    import matplotlib.pyplot as plt
+    from matplotlib import gridspec
+    from lib.Ldraw import setAspect3D
+    tarray = lmdata['tarray']
+    evalA = lmdata['eigValDF']
+    fig = plt.figure(figsize=(width_1col, 0.8*width_1col), dpi=100)
+    gs = gridspec.GridSpec(1,2)
+    ax3D = fig.add_subplot(gs[0], projection='3d')
+    ax2D = fig.add_subplot(gs[1])
+    ax3D.set_xlim((-20,10))
+    ax3D.set_ylim((-25,25))
+    ax2D.set_xlim((-20,10))
+    ax2D.set_ylim((-25,25))
+    for i in range(3):
+        ax3D.plot(np.real(evalA[upto3,i]),
+                  np.imag(evalA[upto3,i]),
+                  tarray[upto3])
+        ax2D.plot(np.real(evalA[upto3,i]),
+                  np.imag(evalA[upto3,i]),
+                  lw=2.0)
+    setAspect3D(ax3D, 0.8)
+    ax2D.set_aspect(0.75)
+    ax2D.grid(True)
+    ax2D.set_xlabel(r'$\mathrm{Re} \lambda$')
+    ax2D.set_ylabel(r'$\mathrm{Im} \lambda$')
+    ax3D.set_xlabel(r'$\mathrm{Re} \lambda$')
+    ax3D.set_ylabel(r'$\mathrm{Im} \lambda$')
+    ax3D.set_zlabel('time', rotation=90)
+    annotatePanel(ax3D, '(a)')
+    annotatePanel(ax2D, '(b)', (1.05, 1))
+    for label, xy in zip([r'$\lambda_{0:d}$'.format(i)
+                          for i in range(1,4)],
+                         [(3.0,16.0),(3.0,-16.0),(-14,2)]):
+        ax2D.annotate(label, xy=xy, xycoords='data', fontsize=12)
+    gs.tight_layout(fig, w_pad=5.0, rect=(0,0,0.95,1.0))
+    return fig
+
+def figDev(tarray, diff, nrmPhi):
+    import matplotlib.pyplot as plt
+    from matplotlib import gridspec
+    from lib.Ldraw import setAspect3D
+    nrmPhi12, nrmPhi3 = nrmPhi
+    fig = plt.figure(figsize=(width_1col, 0.8*width_1col), dpi=150)
+    gs = gridspec.GridSpec(1,2)
+    ax3D = fig.add_subplot(gs[0], projection='3d')
+    ax2D = fig.add_subplot(gs[1])
+    ax3D.set_xlim((-0.1,0.1))
+    ax3D.set_ylim((-0.1, 0.1))
+    ax3D.set_zlim((-0.1, 0.1))
+    setAspect3D(ax3D, 0.8)
+    ax3D.set_xticks((-0.1,0.,0.1))
+    ax3D.set_yticks((-0.1,0.,0.1))
+    ax3D.set_zticks((-0.1,0.0,0.1))
+    ax3D.set_xlabel(r'$X$')
+    ax3D.set_ylabel(r'$Y$')
+    ax3D.set_zlabel(r'$Z$')
+    x,y,z = diff[0,upto1h].T
+    ax3D.plot(x,y,z)
+    annotatePanel(ax3D, '(a)')
+    ax2D.set_aspect(7.5)
+    ax2D.plot(tarray[upto1h], nrmPhi12)
+    ax2D.plot(tarray[upto1h], nrmPhi3)
+    ax2D.set_ylim([-0.02,0.16])
+    ax2D.set_yticks([0.0,0.05,0.1,0.15])
+    ax2D.grid(True)
+    ax2D.set_xlabel(r'$t$')
+    ax2D.set_ylabel('Norm')
+    annotatePanel(ax2D, '(b)')
+    for label, i, nrm, offset in zip(
+                        [r'$|w^{(1)}|_\mathrm{u}$', r'$|w^{(1)}|_\mathrm{s}$'],
+                        [180, 240],
+                        [nrmPhi12, nrmPhi3],
+                        [(-8,4), (0,4)]):
+        ax2D.annotate(label,
+                      xy=(tarray[i], nrm[i]),
+                      xycoords='data',
+                      xytext=offset,
+                      textcoords='offset points',
+                      va="bottom",
+                      ha="center",
+                      fontsize=12)
+    gs.tight_layout(fig, w_pad=5.0, rect=(0.,0.,0.95,1.0))
+    return fig
+
+def figGR(tarray, evalB, maxRealEig, grateDiff):
+    import matplotlib.pyplot as plt
+    from matplotlib import gridspec
+    fig = plt.figure(figsize=(width_1col, 0.7*width_1col), dpi=140)
+    gs = gridspec.GridSpec(1,2)
+    axes = []
+    for g in (gs[0,0], gs[0,1]):
+        ax = fig.add_subplot(g)
+        ax.set_xlim([0.0,3.0])
+        ax.set_ylim([-6.0,10.0])
+        ax.grid(True)
+        axes.append(ax)
+    ax1, ax2 = axes
+    ax1.plot(tarray[upto3], evalB[upto3,0], lw=2.0)
+    ax1.plot(tarray[upto3], evalB[upto3,1], lw=2.0)
+    ax2.plot(tarray[upto3], maxRealEig[upto3], lw=2.0)
+    for ax, label in zip(axes, ['(a)', '(b)']):
+        for grd in grateDiff:
+            ax.plot(tarray[upto3], grd[upto3], ls='--', lw=0.5)
+        ax.set_aspect(0.2)
+        ax.set_xlabel(r'$t$')
+        ax.set_xticks([x for x in range(4)])
+        annotatePanel(ax, label)
+    gs.tight_layout(fig, w_pad=5.0, rect=(0.,0.,0.95,1.0))
+    return fig
+
+def figPsi(sphcB):
+    import matplotlib.pyplot as plt
+    from matplotlib import gridspec
+    fig = plt.figure(figsize=(0.8*width_1col, 0.5*width_1col), dpi=180)
+    gs = gridspec.GridSpec(1,1)
+    ax = fig.add_subplot(gs[0])
+    ax.set_ylim([-0.05*np.pi, 3.0*np.pi/4.0 + 0.05*np.pi])
+    ax.set_xlim([np.pi/2.0 - 0.05*np.pi, np.pi + 0.05*np.pi])
+    ax.set_yticks(np.arange(0.0, np.pi*0.76, np.pi/4))
+    ax.set_yticklabels([r'$0$', r'$\pi/4$', r'$\pi/2$', r'$3\pi/4$'])
+    ax.set_xticks(np.arange(np.pi*0.5, np.pi*1.1, np.pi/4))
+    ax.set_xticklabels([r'$\pi/2$', r'$3\pi/4$', r'$\pi$'])
+    ax.grid(True)
+    for i in range(3):
+        ax.plot(sphcB[upto3,i,2], sphcB[upto3,i,1])
+    ax.set_aspect(0.7)
+    ax.set_ylabel(r'$\theta$')
+    ax.set_xlabel(r'$\varphi$')
+    for label, xy in zip([r'$\psi_{0:d}$'.format(i)
+                          for i in range(1,4)],
+                         [(0.8*np.pi, 0.3*np.pi),
+                          (0.78*np.pi, 0.04*np.pi),
+                          (0.9*np.pi, 0.7*np.pi)]):
+        ax.annotate(label, xy=xy, xycoords='data',
+                    va='center', ha='center')
+    gs.tight_layout(fig, w_pad=5.0, rect=(0.,0.,0.95,1.0))
+    return fig
+
+def figOMG(tarray, gab12, sphcOmega2):
+    import matplotlib.pyplot as plt
+    from matplotlib import gridspec
+    gamma2 = gab12[1,0]
+    fig = plt.figure(figsize=(width_1col, 0.8*width_1col), dpi=140)
+    gs = gridspec.GridSpec(1,2)
+
+    ax1 = fig.add_subplot(gs[0])
+    ax1.set_xlim([0.,3.])
+    ax1.set_ylim([-1.,20.])
+    ax1.plot(tarray[upto3], gamma2[upto3])
+    ax1.grid(True)
+    ax1.set_xlabel(r'$t$')
+    ax1.set_aspect(0.14)
+    ax1.set_yticks([x*np.pi for x in range(7)])
+    ax1.set_yticklabels([r'$0$', r'$\pi$']
+                        + [r'${0:d}\pi$'.format(i) for i in range(2,7)])
+    ax1.annotate(r'$|\tilde{\omega}|$',
+                 xy=(1.4,15.5), xycoords='data',
+                 va="bottom", ha="center", fontsize=12)
+    annotatePanel(ax1, '(a)')
+
+    ax2 = fig.add_subplot(gs[1])
+    ax2.set_ylim([np.pi/2.0 - 0.1*np.pi, np.pi + 0.1*np.pi])
+    ax2.set_xlim([-0.1*np.pi, np.pi + 0.1*np.pi])
+    ax2.set_yticks(np.arange(np.pi/2.0, np.pi + 0.1, np.pi/4.0))
+    ax2.set_yticklabels([r'$\pi/2$', r'$3\pi/4$', r'$\pi$'])
+    ax2.set_xticks(np.arange(0.0, np.pi + 0.1, np.pi/4.0))
+    ax2.set_xticklabels([r'$0$', r'$\pi/4$', r'$\pi/2$',
+                         r'$3\pi/4$', r'$\pi$'])
+    ax2.grid(True)
+    ax2.plot(sphcOmega2[upto3,2], sphcOmega2[upto3,1])
+    ax2.set_aspect(1.6)
+    ax2.set_ylabel(r'$\theta$')
+    ax2.set_xlabel(r'$\varphi$')
+    ax2.annotate(r'$\tilde{\omega}$',
+                 xy=(1.5/4.0*np.pi, 3.1/4.0*np.pi), xycoords='data',
+                 va="center", ha="center", fontsize=12)
+    annotatePanel(ax2, '(b)')
+    gs.tight_layout(fig, w_pad=5.0, rect=(0.,0.,0.95,1.0))
+    return fig
+
+def figCE(ce):
+    import matplotlib.pyplot as plt
+    from matplotlib import gridspec
+    t, y = ce
+    fig = plt.figure(figsize=(width_1col, 0.7*width_1col), dpi=140)
+    gs = gridspec.GridSpec(1,2)
+    ax1 = fig.add_subplot(gs[0])
+    ax2 = fig.add_subplot(gs[1])
+    ax1.plot(y[:,0], y[:,1])
+    ax1.set_aspect(1.0)
+    ax1.grid(True)
+    ax1.set_xlabel(r'$u_1$')
+    ax1.set_ylabel(r'$u_2$')
+    ax2.plot(t, np.linalg.norm(y, axis=-1))
+    ax2.set_aspect(5.0)
+    ax2.grid(True)
+    ax2.set_xlabel(r'$t$')
+    ax2.set_ylabel(r'$|u|$')
+    gs.tight_layout(fig, w_pad=5.0, rect=(0.,0.,0.95,1.0))
+    return fig
+
+# output file: (function, names of its arguments)
+figures = dict([
+    ('figOne.pdf', (figOne, ('sdata',))),
+    ('figMul.pdf', (figMul, ('lmdata',))),
+    ('figEigSym.pdf', (figEigSym, ('tarray', 'evalB'))),
+    ('figNormDiff.pdf', (figNormDiff, ('tarray', 'normDiff'))),
+    ('figEigA.pdf', (figEigA, ('lmdata',))),
+    ('figDev.pdf', (figDev, ('tarray', 'diff', 'nrmPhi'))),
+    ('figGR.pdf', (figGR, ('tarray', 'evalB', 'maxRealEig', 'grateDiff'))),
+    ('figPsi.pdf', (figPsi, ('sphcB',))),
+    ('figOMG.pdf', (figOMG, ('tarray', 'gab12', 'sphcOmega2'))),
+    ('CE.pdf', (figCE, ('ce',))),
+    ])
+
+
+#
+# stamps and rendering
+#
+
+def closure(names):
+    '''
+    Return names with every quantity and data file they depend on.
+    '''
+
+    keep = set(); todo = list(names)
+    while todo:
+        n = todo.pop()
+        if n not in keep:
+            keep.add(n)
+            if n in quantities:
+                todo += list(quantities[n][1])
+    return keep
+
+def stamp(figname):
+    func, args = figures[figname]
+    h = hashlib.sha1(inspect.getsource(func).encode())
+    for helper in (cart2spher, ce_rhs, annotatePanel):
+        h.update(inspect.getsource(helper).encode())
+    h.update(repr((upto1h, upto3)).encode())
+    for n in sorted(closure(args)):
+        if n in datafiles:
+            st = os.stat(datafiles[n])
+            h.update('{0} {1} {2}'.format(n, st.st_size,
+                                          st.st_mtime_ns).encode())
+        else:
+            h.update(inspect.getsource(quantities[n][0]).encode())
+    for fn in codefiles:
+        with open(fn, 'rb') as fh:
+            h.update(fh.read())
+    return h.hexdigest()
+
+def readStamps():
+    if not path.exists(stampfn):
+        return dict()
+    with open(stampfn) as fh:
+        return json.load(fh)
+
+def writeStamps(stamps):
+    with open(stampfn, 'w') as fh:
+        json.dump(stamps, fh, indent=1, sort_keys=True)
+
+def computeShared(names):
+    '''
+    Load the data files and compute the quantities in names
+    (and what they need), each once.
+    '''
+
+    shared = dict()
+    def get(n):
+        if n not in shared:
+            if n in datafiles:
+                shared[n] = dm.loadData(datafiles[n])
+            else:
+                func, args = quantities[n]
+                shared[n] = func(*[get(a) for a in args])
+        return shared[n]
+    for n in names:
+        get(n)
+    return shared
+
+_shared = None
+
+def _initWorker(shared):
+    global _shared
+    _shared = shared
+    import matplotlib
+    matplotlib.use('Agg') # off-screen rendering
+    matplotlib.rcParams.update(style)
+
+def _render(figname):
+    import matplotlib.pyplot as plt
+    func, args = figures[figname]
+    fig = func(*[_shared[a] for a in args])
+    fig.savefig(path.join(figdir, figname))
+    plt.close(fig)
+    return figname
+
+def render(fignames=None, nproc=None, force=False):
+    '''
+    Render the figures that are out of date.
+
+    fignames: output file names (default: all figures)
+    nproc: number of worker processes (None: os.cpu_count())
+    force: render every figure even if it is up to date
+
+    return: {figname: 'done' | 'skipped' | 'failed'}
+    '''
+
+    fignames = list(figures) if fignames is None else list(fignames)
+    stamps = readStamps()
+    new = dict((f, stamp(f)) for f in fignames)
+    status = dict()
+    todo = []
+    for f in fignames:
+        if (not force) and stamps.get(f) == new[f] \
+                and path.exists(path.join(figdir, f)):
+            status[f] = 'skipped'
+        else:
+            todo.append(f)
+    if not todo:
+        return status
+
+    names = set()
+    for f in todo:
+        names |= set(figures[f][1])
+    shared = computeShared(names)
+    shared = dict((n, shared[n]) for n in names)
+
+    os.makedirs(figdir, exist_ok=True)
+    def finish(f, err):
+        if err is None:
+            status[f] = 'done'; stamps[f] = new[f]
+        else:
+            status[f] = 'failed'; stamps.pop(f, None)
+            print('{0}: {1!r}'.format(f, err))
+
+    if nproc == 1 or len(todo) == 1:
+        _initWorker(shared)
+        for f in todo:
+            try:
+                _render(f); finish(f, None)
+            except Exception as e:
+                finish(f, e)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(nproc, initializer=_initWorker,
+                                 initargs=(shared,)) as pool:
+            futures = dict((f, pool.submit(_render, f)) for f in todo)
+            for f, fut in futures.items():
+                finish(f, fut.exception())
+
+    writeStamps(stamps)
+    return status
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('names', nargs='*',
+                        help='figures to render, e.g. figGR '
+                             '(default: all)')
+    parser.add_argument('-j', '--nproc', type=int, default=None)
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+
+    fignames = None
+    if args.names:
+        fignames = [n if n.endswith('.pdf') else n + '.pdf'
+                        for n in args.names]
+        unknown = [f for f in fignames if f not in figures]
+        if unknown:
+            parser.error('unknown figures: ' + ' '.join(unknown))
+    status = render(fignames, nproc=args.nproc, force=args.force)
+    for f, s in sorted(status.items()):
+        print('{0}: {1}'.format(f, s))
@@ -59,11 +59,17 @@ def make_movie(data,trange,movfn):
 
     frame1.mkMov(movfn, trange)
 
-for infn, outfn,trange in zip(['m_orbit.hdf5','lm_orbit.hdf5'],
-                        ['lorenz01.mp4','lorenz02.mp4'],
-                        [[0.0,4.0],[0.0,12.0]]
-                    ):
+movies = list(zip(['m_orbit.hdf5','lm_orbit.hdf5'],
+                ['lorenz01.mp4','lorenz02.mp4'],
+                [[0.0,4.0],[0.0,12.0]]
+            ))
+
+def render(infn, outfn, trange):
     fn = path.join('data',infn)
     data = dm.loadData(fn)
     movfn = path.join('..','movie',outfn)
     make_movie(data,trange,movfn)
+
+if __name__ == '__main__':
+    for infn, outfn, trange in movies:
+        render(infn, outfn, trange)
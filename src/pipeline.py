@@ -0,0 +1,76 @@
+
+# coding: utf-8
+
+'''
+Regenerate the data and the movies.
+
+    $ python pipeline.py            # run stages that are out of date
+    $ python pipeline.py -j 4       # with 4 worker processes
+    $ python pipeline.py --force    # run every stage
+    $ python pipeline.py lorenz02   # only lorenz02 and what it needs
+
+The three orbits are computed concurrently and each movie is rendered
+as soon as its input file is written.
+'''
+
+from os import path
+import argparse
+
+from lib.Lstage import Stage, runStages, stageDeps
+import comput
+
+
+def render_movie(infn, outfn, trange):
+    # matplotlib is loaded only in the worker that renders
+    import make_movie
+    make_movie.render(infn, outfn, trange)
+
+
+stages = [
+    Stage('s_orbit', comput.comp_s_orbit,
+            inputs=[comput.fn], outputs=[comput.s_orbit_fn],
+            kwargs=dict(overwrite=True)),
+    Stage('m_orbit', comput.comp_m_orbit,
+            inputs=[comput.fn], outputs=[comput.m_orbit_fn],
+            kwargs=dict(overwrite=True)),
+    Stage('lm_orbit', comput.comp_lm_orbit,
+            inputs=[comput.fn], outputs=[comput.lm_orbit_fn],
+            kwargs=dict(overwrite=True)),
+    ]
+
+for infn, outfn, trange in zip(['m_orbit.hdf5','lm_orbit.hdf5'],
+                            ['lorenz01.mp4','lorenz02.mp4'],
+                            [[0.0,4.0],[0.0,12.0]]
+                        ):
+    stages.append(
+        Stage(outfn[:-4], render_movie,
+            inputs=[path.join('data',infn)],
+            outputs=[path.join('..','movie',outfn)],
+            args=(infn, outfn, trange))
+        )
+
+
+def select(stages, names):
+    '''
+    Return the named stages and every stage they depend on.
+    '''
+
+    deps = stageDeps(stages)
+    keep = set(); todo = list(names)
+    while todo:
+        n = todo.pop()
+        if n not in keep:
+            keep.add(n); todo += list(deps[n])
+    return [s for s in stages if s.name in keep]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('names', nargs='*',
+                        help='stages to run (default: all)')
+    parser.add_argument('-j', '--nproc', type=int, default=None)
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+
+    _stages = select(stages, args.names) if args.names else stages
+    runStages(_stages, nproc=args.nproc, force=args.force)
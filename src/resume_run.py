@@ -0,0 +1,26 @@
+
+# coding: utf-8
+
+'''
+Continue checkpointed runs (lib.Lckpt) after a crash or a kill.
+
+    $ python resume_run.py data/run.hdf5 [data/run2.hdf5 ...]
+    $ python resume_run.py --every 300 data/run.hdf5
+'''
+
+import argparse, sys
+
+import lib.Lckpt as ckpt
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--every', type=float, default=None,
+                        help='seconds between checkpoints')
+    args = parser.parse_args()
+
+    ok = True
+    for fpath in args.files:
+        ok = bool(ckpt.resumeCkpt(fpath, every=args.every)) and ok
+    sys.exit(0 if ok else 1)